@@ -1,6 +1,7 @@
 import google.generativeai as genai
 from dotenv import load_dotenv
 import os
+from model_cache import cached_model_names
 
 # Load environment variables
 load_dotenv()
@@ -10,9 +11,9 @@ genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
 # List available models
 print("Available Models:")
-available_models = genai.list_models()
-for model in available_models:
-    print(model.name)
+available_models = cached_model_names("gemini", os.getenv("GEMINI_API_KEY"), lambda: [model.name for model in genai.list_models()])
+for model_name in available_models:
+    print(model_name)
 
 # Initialize the model
 model = genai.GenerativeModel('models/gemini-2.0-pro-exp')
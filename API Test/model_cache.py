@@ -0,0 +1,32 @@
+import hashlib
+import json
+import os
+import time
+
+# Model listings rarely change, so reuse them across test runs for a while
+MODELS_CACHE_TTL = 10 * 60
+MODELS_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "cloud-architecture-assistant")
+
+def cached_model_names(provider, api_key, list_models):
+    """Return model names for a provider, using a short-lived disk cache per API key"""
+    # A different key may see different models, so it gets its own cache file
+    key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+    cache_path = os.path.join(MODELS_CACHE_DIR, f"{provider}-{key_hash}-models.json")
+
+    # Serve from cache while it is fresh
+    try:
+        if time.time() - os.stat(cache_path).st_mtime < MODELS_CACHE_TTL:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    # Fetch from the provider and refresh the cache
+    names = list_models()
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(names, f)
+    except OSError:
+        pass
+    return names
@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
 import openai
+from model_cache import cached_model_names
 
 # Load environment variables
 load_dotenv()
@@ -12,9 +13,9 @@ def test_openai_api():
     try:
         # List available models using the new API
         print("Available Models:")
-        models = openai.models.list()
-        for model in models.data:
-            print(f"- {model.id}")
+        model_ids = cached_model_names("openai", openai.api_key, lambda: [model.id for model in openai.models.list().data])
+        for model_id in model_ids:
+            print(f"- {model_id}")
 
         # Test the API with a simple prompt
         print("\nTesting API with a simple prompt...")
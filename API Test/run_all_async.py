@@ -0,0 +1,62 @@
+import asyncio
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+TEST_PROMPT = "Yo!, this is a test message."
+
+async def test_openai():
+    """Send the test prompt to OpenAI"""
+    from openai import AsyncOpenAI
+
+    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    response = await client.chat.completions.create(
+        model="gpt-4o-2024-11-20",
+        messages=[
+            {"role": "user", "content": TEST_PROMPT}
+        ]
+    )
+    return response.choices[0].message.content
+
+async def test_gemini():
+    """Send the test prompt to Gemini"""
+    import google.generativeai as genai
+
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    model = genai.GenerativeModel('models/gemini-2.0-pro-exp')
+    response = await model.generate_content_async(TEST_PROMPT)
+    return response.text
+
+async def test_mistral():
+    """Send the test prompt to Mistral"""
+    from mistralai import Mistral
+
+    client = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
+    response = await client.chat.complete_async(
+        model="open-mixtral-8x22b",
+        messages=[
+            {"role": "user", "content": TEST_PROMPT}
+        ]
+    )
+    return response.choices[0].message.content
+
+async def run_all():
+    """Run every provider test concurrently and report each result"""
+    tests = {
+        "OpenAI": test_openai(),
+        "Gemini": test_gemini(),
+        "Mistral": test_mistral(),
+    }
+    # Total wall time is the slowest provider rather than the sum of all of them
+    results = await asyncio.gather(*tests.values(), return_exceptions=True)
+
+    for name, result in zip(tests, results):
+        if isinstance(result, Exception):
+            print(f"{name}: Error: {str(result)}")
+        else:
+            print(f"{name}: Response: {result}")
+
+if __name__ == "__main__":
+    asyncio.run(run_all())
@@ -1,27 +1,71 @@
 from __future__ import print_function, unicode_literals  # Enable Python 3 print function and unicode literals
-import botocore.session  # Import AWS SDK session management
+import argparse  # Import command line argument parsing
+import atexit  # Import exit hooks for closing the HTTP session
+import functools  # Import caching decorators
+import gzip  # Import gzip for compressed cache files
+import hashlib  # Import hashing for cache file names
+import orjson  # Import fast JSON parser for index documents
+import os  # Import filesystem helpers
+import pickle  # Import pickle for caching parsed pricing options
+import sys  # Import stderr for error reporting
+import tempfile  # Import temporary files for atomic cache writes
+import time  # Import time for cache expiry checks
+from collections import Counter, defaultdict  # Import counting and grouping helpers for option indexes
+from concurrent.futures import ThreadPoolExecutor, as_completed  # Import thread pool for parallel downloads
+from dataclasses import dataclass  # Import dataclass for compact option records
 import inquirer  # Import interactive command line interface library
-import pandas as pd  # Import pandas for data manipulation
 import requests  # Import requests for HTTP calls
+from requests.adapters import HTTPAdapter  # Import adapter for connection pooling
+from regions import REGIONS as regions  # Import snapshot of available AWS regions
+from urllib3.util.retry import Retry  # Import retry policy for transient HTTP errors
 from yaspin import yaspin  # Import spinner for loading animations
 
-session = botocore.session.get_session()  # Create AWS session
-regions = session.get_available_regions('ec2')  # Get list of available AWS regions
-
 PRICING_API='https://pricing.us-east-1.amazonaws.com'  # AWS Pricing API base URL
 OFFER_INDEX='/offers/v1.0/aws/index.json'  # Path to AWS service offerings index
 DONE_ITEM = '✓ done'  # Symbol for completing selection
 SPINNER_OK = '✅ '  # Symbol for successful operation
 SPINNER_FAIL = '💥 '  # Symbol for failed operation
+HTTP_TIMEOUT = (5, 30)  # Connect and read timeouts in seconds
+PREFETCH_SERVICES = ('AWSLambda', 'AmazonS3', 'AmazonDynamoDB', 'AmazonSNS', 'AmazonSQS', 'AmazonApiGateway')  # Popular services with small pricing files
+PREFETCH_WORKERS = 16  # Maximum parallel downloads while prefetching
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'aws-pricing')  # On-disk cache for pricing documents
+CACHE_TTL = 24 * 60 * 60  # Pricing data changes at most daily
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes read per chunk when streaming pricing files
+PRICING_TERMS = ('OnDemand', 'Reserved')  # Pricing models offered in the form
+ETAG_SUFFIX = '.etag'  # Sidecar file holding the ETag of a cached response
+OPTIONS_SUFFIX = '.options.pickle'  # Sidecar file holding parsed pricing options
+LABEL_ATTRIBUTES = (  # Product attributes read by get_product_label
+    'servicecode', 'productFamily', 'instanceFamily', 'instanceType', 'operatingSystem', 'vcpu', 'tenancy',
+    'preInstalledSw', 'capacitystatus', 'loadBalancerType', 'group', 'operation', 'volumeType',
+    'databaseEngine', 'deploymentOption',
+)
+
+http_session = requests.Session()  # Reuse TCP/TLS connections across pricing API calls
+http_session.mount('https://', HTTPAdapter(  # Mount pooled adapter for HTTPS requests
+    pool_connections=10,  # Number of host pools to cache
+    pool_maxsize=50,  # Maximum connections kept per host
+    max_retries=Retry(total=5, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], allowed_methods={'GET'}),  # Retry transient failures with backoff
+))
+atexit.register(http_session.close)  # Close pooled connections on exit
+
+@dataclass(slots=True)
+class Option:
+    name: str  # Option name
+    key: str  # Unique identifier
+    unit: str  # Pricing unit
+    price: str  # Price in USD
+    product_family: str  # Product family
+    attributes: dict  # Product attributes
 
 def load_offers():
     with yaspin(text='Querying ' + PRICING_API + OFFER_INDEX, color="yellow") as spinner:  # Show loading spinner
         try:
-            index_response = requests.get(PRICING_API + OFFER_INDEX)  # Fetch AWS service offerings
+            offers = fetch_json(OFFER_INDEX)['offers']  # Fetch AWS service offerings
             spinner.ok(SPINNER_OK)  # Show success symbol
-            return index_response.json()['offers']  # Return available service offerings
-        except:
+            return offers  # Return available service offerings
+        except (requests.RequestException, ValueError, KeyError) as e:
             spinner.fail(SPINNER_FAIL)  # Show failure symbol
+            print(f"load_offers failed: {e}", file=sys.stderr)  # Report why the index could not be loaded
             return None
 
 def prompt_region():
@@ -37,84 +81,285 @@ def prompt_region():
     answer = inquirer.prompt(question)  # Show prompt and get user input
     return answer['region'] if answer else None  # Return selected region or None
 
-def prompt_service(services_list, service):
-    question = [  # Create service selection prompt
+def service_question(services_list, default):
+    return [  # Create service selection prompt
         inquirer.List('service',
                   message="Select and AWS Service?",  # Prompt message
                   choices=services_list,  # Available services
-                  default=service,  # Default selection
+                  default=default,  # Default selection, resolved on every prompt
                   carousel=True,  # Enable scrolling
               )
     ]
 
+def prompt_service(question):
     answer = inquirer.prompt(question)  # Show prompt and get user input
     return answer['service'] if answer else None  # Return selected service or None
 
-def get_regional_service(region, offer):
-    regional_service_offer = requests.get(PRICING_API + offer['currentRegionIndexUrl'])  # Fetch regional service data
-    offer_regions = regional_service_offer.json()['regions']  # Get available regions for service
+def get_cache_path(path):
+    return os.path.join(CACHE_DIR, hashlib.sha256(path.encode('utf-8')).hexdigest() + '.json.gz')  # Cache file for pricing API path
+
+def is_fresh(cache_path):
+    try:
+        return time.time() - os.stat(cache_path).st_mtime < CACHE_TTL  # Check cache file age
+    except OSError:
+        return False  # Missing cache file
+
+def read_cache(cache_path):
+    try:
+        with gzip.open(cache_path, 'rb') as cache_file:  # Open compressed cache file
+            return orjson.loads(cache_file.read())  # Return cached JSON
+    except (OSError, ValueError):
+        return None  # Treat unreadable cache files as a miss
+
+def validator_headers(cache_path):
+    try:
+        if os.path.exists(cache_path):  # Only revalidate when a cached copy exists
+            with open(cache_path + ETAG_SUFFIX, 'r', encoding='utf-8') as etag_file:  # Open stored ETag
+                return {'If-None-Match': etag_file.read()}  # Ask the server to skip unchanged bodies
+    except OSError:
+        pass  # No stored ETag
+    return {}
+
+def write_etag(cache_path, response):
+    etag = response.headers.get('ETag')  # Validator sent by the server
+    try:
+        if etag:  # If the server supports revalidation
+            with open(cache_path + ETAG_SUFFIX, 'w', encoding='utf-8') as etag_file:  # Open sidecar file
+                etag_file.write(etag)  # Store ETag for the next conditional request
+    except OSError:
+        pass  # Caching is best effort
+
+def drop_cache(cache_path):
+    for path in (cache_path, cache_path + ETAG_SUFFIX, cache_path + OPTIONS_SUFFIX):  # Remove the download and its sidecars
+        try:
+            os.remove(path)  # Force a fresh download next time
+        except OSError:
+            pass  # Sidecar may not exist
+
+def touch_cache(cache_path):
+    for path in (cache_path, cache_path + OPTIONS_SUFFIX):  # Refresh the download, then its parsed options
+        try:
+            os.utime(path)  # Restart the TTL without rewriting the file
+        except OSError:
+            pass  # Parsed options may not exist yet
+
+def write_cache(cache_path, response):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)  # Create cache directory
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')  # Write to a temporary file first
+        with os.fdopen(fd, 'wb') as raw_file, gzip.GzipFile(fileobj=raw_file, mode='wb', compresslevel=1) as cache_file:  # Compress while writing
+            cache_file.write(response.content)  # Store raw response body
+        os.replace(tmp_path, cache_path)  # Atomically publish cache file
+        write_etag(cache_path, response)  # Remember validator for revalidation
+    except OSError:
+        pass  # Caching is best effort
+
+@functools.lru_cache(maxsize=32)
+def fetch_json(path):
+    cache_path = get_cache_path(path)  # Locate cache file
+    if is_fresh(cache_path):  # If cached copy is still fresh
+        cached = read_cache(cache_path)  # Try on-disk cache first
+        if cached is not None:  # If cache hit
+            return cached  # Return cached JSON
+
+    response = http_session.get(PRICING_API + path, headers=validator_headers(cache_path), timeout=HTTP_TIMEOUT)  # Revalidate or fetch document
+    if response.status_code == 304:  # If cached copy is unchanged on the server
+        cached = read_cache(cache_path)  # Reuse cached copy
+        if cached is not None:  # If cache is readable
+            touch_cache(cache_path)  # Restart its TTL
+            return cached  # Return cached JSON
+        response = http_session.get(PRICING_API + path, timeout=HTTP_TIMEOUT)  # Fetch full document again
+
+    response.raise_for_status()  # Fail on HTTP errors
+    write_cache(cache_path, response)  # Store response for later runs
+    return orjson.loads(response.content)  # Return decoded JSON
+
+def download_cached(path):
+    cache_path = get_cache_path(path)  # Locate cache file
+    if is_fresh(cache_path):  # If cached copy is still fresh
+        return cache_path  # Reuse cached download
+
+    os.makedirs(CACHE_DIR, exist_ok=True)  # Create cache directory
+    with http_session.get(PRICING_API + path, headers=validator_headers(cache_path), stream=True, timeout=HTTP_TIMEOUT) as response:  # Revalidate or stream document
+        if response.status_code == 304:  # If cached copy is unchanged on the server
+            touch_cache(cache_path)  # Restart its TTL
+            return cache_path  # Reuse cached download
+        response.raise_for_status()  # Fail on HTTP errors
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')  # Write to a temporary file first
+        try:
+            with os.fdopen(fd, 'wb') as raw_file, gzip.GzipFile(fileobj=raw_file, mode='wb', compresslevel=1) as cache_file:  # Compress while writing
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):  # Read body in chunks
+                    cache_file.write(chunk)  # Store chunk without holding the whole body
+        except BaseException:
+            os.remove(tmp_path)  # Drop partial download
+            raise
+    os.replace(tmp_path, cache_path)  # Atomically publish cache file
+    write_etag(cache_path, response)  # Remember validator for revalidation
+    return cache_path  # Return path to cached download
+
+def stream_section(cache_path, prefix):
+    import ijson  # Import streaming JSON parser only when a pricing file is parsed
+    with gzip.open(cache_path, 'rb') as cache_file:  # Open compressed pricing file
+        yield from ijson.kvitems(cache_file, prefix)  # Yield entries under prefix one at a time
+
+def get_version_url(region, offer):
+    offer_regions = fetch_json(offer['currentRegionIndexUrl'])['regions']  # Get available regions for service
     offer_region = offer_regions.get(region, {})  # Get specific region data
-    current_version_url = offer_region.get('currentVersionUrl', None)  # Get current pricing version URL
+    return offer_region.get('currentVersionUrl', None)  # Get current pricing version URL
 
+def fetch_regional_service(region, offer):
+    import ijson  # Import streaming JSON parser for its error type
+    current_version_url = get_version_url(region, offer)  # Get current pricing version URL
     if current_version_url:  # If pricing data exists for region
-        with yaspin(text='Querying ' + PRICING_API + current_version_url, color="yellow") as spinner:  # Show loading spinner
-            service_pricing = requests.get(PRICING_API + current_version_url)  # Fetch pricing data
-            spinner.ok(SPINNER_OK)  # Show success symbol
-            return service_pricing.json()  # Return pricing data
-
-def get_options_list(options_list, service_offer):
-    return_options = []  # Initialize list for options
-
-    for product in options_list:  # Iterate through products
-        for offer in options_list[product]:  # Iterate through offers
-            for price in options_list[product][offer]['priceDimensions']:  # Iterate through price dimensions
-                item = options_list.get(product, {}).get(offer, {}).get('priceDimensions', {}).get(price, {})  # Get price details
-                if item:  # If price details exist
-                    item_id = item['rateCode'].split('.')  # Split rate code
-
-                    product_offer = service_offer['products'][item_id[0]]  # Get product details
-
-                    return_options.append({  # Add option to list
-                        'name': item['description'],  # Option name
-                        'key': item['rateCode'],  # Unique identifier
-                        'unit': item['unit'],  # Pricing unit
-                        'price': item['pricePerUnit']['USD'],  # Price in USD
-                        'productFamily': product_offer.get('productFamily', 'Other'),  # Product family
-                        'attributes': product_offer.get('attributes', {}),  # Product attributes
-                    })
-
-    return return_options  # Return list of options
+        cache_path = download_cached(current_version_url)  # Fetch pricing data
+        try:
+            return load_all_options(cache_path)  # Parse pricing data
+        except (EOFError, ijson.JSONError, KeyError, ValueError):
+            drop_cache(cache_path)  # Discard the truncated or corrupt download
+            raise
 
-def get_product_label(x):
-    if not x.get('attributes'):
-        return x.get('name', 'Unknown Product')
+def get_regional_service(region, offer):
+    with yaspin(text='Querying ' + PRICING_API + offer['currentRegionIndexUrl'], color="yellow") as spinner:  # Show loading spinner
+        service_pricing = fetch_regional_service(region, offer)  # Fetch region index and pricing data
+        spinner.ok(SPINNER_OK)  # Show success symbol
+        return service_pricing  # Return pricing data
+
+def prefetch_regional_services(region, offers, services):
+    import ijson  # Import streaming JSON parser for its error type
+    services = [s for s in services if s in offers]  # Skip services missing from the index
+    prefetched = {}  # Pricing data keyed by service name
+
+    with yaspin(text=f'Prefetching {len(services)} services for {region}', color="yellow") as spinner:  # Show loading spinner
+        with ThreadPoolExecutor(max_workers=PREFETCH_WORKERS) as executor:  # Run downloads in parallel
+            futures = {executor.submit(fetch_regional_service, region, offers[s]): s for s in services}  # Chain index and pricing fetch per service
+            for future in as_completed(futures):  # Collect pricing files as they finish
+                try:
+                    service_pricing = future.result()  # Get pricing data
+                except (requests.RequestException, OSError, EOFError, ijson.JSONError, KeyError, ValueError):
+                    continue  # Fall back to on-demand fetch for this service
+                if service_pricing:  # If pricing data exists for region
+                    prefetched[futures[future]] = service_pricing  # Store pricing data
+        spinner.ok(SPINNER_OK)  # Show success symbol
+
+    return prefetched  # Return prefetched pricing data
+
+def prefetch_region_indexes(offers):
+    failed = 0  # Number of region indexes that could not be fetched
+    with yaspin(text=f'Caching {len(offers)} region indexes', color="yellow") as spinner:  # Show loading spinner
+        with ThreadPoolExecutor(max_workers=PREFETCH_WORKERS) as executor:  # Run downloads in parallel
+            futures = [executor.submit(fetch_json, offer['currentRegionIndexUrl']) for offer in offers.values()]  # Fetch every region index
+            for future in as_completed(futures):  # Wait for downloads to finish
+                try:
+                    future.result()  # Surface download errors
+                except (requests.RequestException, ValueError):
+                    failed += 1  # Count failed download
+        spinner.ok(SPINNER_OK)  # Show success symbol
+    return len(futures) - failed  # Return number of cached region indexes
+
+def get_all_options(cache_path):
+    products = {}  # Product family and label attributes by SKU
+    for sku, product in stream_section(cache_path, 'products'):  # Iterate through streamed products
+        attributes = product.get('attributes', {})  # Full product attributes
+        products[sku] = (  # Keep only the fields used by the form
+            product.get('productFamily', 'Other'),  # Product family
+            {attr: attributes[attr] for attr in LABEL_ATTRIBUTES if attr in attributes},  # Label attributes
+        )
+    all_options = {term: [] for term in PRICING_TERMS}  # Options per pricing model
+
+    for term in PRICING_TERMS:  # Iterate through pricing models
+        append_option = all_options[term].append  # Bind list append once
+        for sku, product_offers in stream_section(cache_path, 'terms.' + term):  # Iterate through streamed products
+            product_offer = products.get(sku)  # Look up product details once per SKU
+            if product_offer is None:  # Skip terms without a matching product
+                continue
+            product_family, attributes = product_offer  # Product family and label attributes
+
+            for offer in product_offers.values():  # Iterate through offers
+                for item in offer['priceDimensions'].values():  # Iterate through price dimensions
+                    append_option(Option(  # Add option to list
+                        item['description'],  # Option name
+                        item['rateCode'],  # Unique identifier
+                        item['unit'],  # Pricing unit
+                        item['pricePerUnit']['USD'],  # Price in USD
+                        product_family,  # Product family
+                        attributes,  # Product attributes
+                    ))
+
+    return all_options  # Return options per pricing model
+
+def load_all_options(cache_path):
+    options_path = cache_path + OPTIONS_SUFFIX  # Parsed options stored next to the pricing file
+    try:
+        if os.stat(options_path).st_mtime >= os.stat(cache_path).st_mtime:  # If parsed after the last download
+            with open(options_path, 'rb') as options_file:  # Open parsed options
+                return pickle.load(options_file)  # Skip re-parsing the pricing file
+    except (OSError, pickle.PickleError, EOFError, AttributeError, ImportError):
+        pass  # Treat unreadable parsed options as a miss
+
+    all_options = get_all_options(cache_path)  # Parse the pricing file
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')  # Write to a temporary file first
+        with os.fdopen(fd, 'wb') as options_file:  # Open temporary file
+            pickle.dump(all_options, options_file, protocol=pickle.HIGHEST_PROTOCOL)  # Store parsed options
+        os.replace(tmp_path, options_path)  # Atomically publish parsed options
+    except (OSError, pickle.PickleError):
+        pass  # Caching is best effort
+    return all_options  # Return options per pricing model
+
+def get_attributes_label(attrs):
+    if not attrs:
+        return None
         
-    service_code = x['attributes'].get('servicecode', '')
-    product_family = x['attributes'].get('productFamily', '')
+    service_code = attrs.get('servicecode', '')
+    product_family = attrs.get('productFamily', '')
     
     if service_code == 'AmazonEC2' and product_family == 'Compute Instance':
         # Format EC2 instance label
-        return f"{x['attributes'].get('instanceFamily', '')} - {x['attributes'].get('instanceType', '')} - {x['attributes'].get('operatingSystem', '')} - vcpu={x['attributes'].get('vcpu', '')} - {x['attributes'].get('tenancy', '')} - {x['attributes'].get('preInstalledSw', '')} - {x['attributes'].get('capacitystatus', '')}"
+        return f"{attrs.get('instanceFamily', '')} - {attrs.get('instanceType', '')} - {attrs.get('operatingSystem', '')} - vcpu={attrs.get('vcpu', '')} - {attrs.get('tenancy', '')} - {attrs.get('preInstalledSw', '')} - {attrs.get('capacitystatus', '')}"
     elif service_code == 'AWSELB' or 'Load Balancer' in product_family:
         # Format Load Balancer label
-        return f"{x['attributes'].get('loadBalancerType', 'Load Balancer')} - {x['attributes'].get('group', '')} - {x['attributes'].get('operation', '')}"
+        return f"{attrs.get('loadBalancerType', 'Load Balancer')} - {attrs.get('group', '')} - {attrs.get('operation', '')}"
     else:
         # For other services, return a combination of relevant attributes
         label_parts = []
-        for attr in ['instanceType', 'volumeType', 'databaseEngine', 'deploymentOption']:
-            if attr in x['attributes']:
-                label_parts.append(f"{attr}={x['attributes'][attr]}")
+        for attr in ('instanceType', 'volumeType', 'databaseEngine', 'deploymentOption'):
+            if attr in attrs:
+                label_parts.append(f"{attr}={attrs[attr]}")
         
         if label_parts:
             return f"{product_family} - {' - '.join(label_parts)}"
-        return x.get('name', 'Unknown Product')
-
-def prompt_service_form(service_offer, service):
-    terms = service_offer.get('terms', {})  # Get pricing terms
-    products = service_offer.get('products', {})  # Get product details
+        return None
 
-    ondemand_options = get_options_list(terms.get('OnDemand', {}), service_offer)  # Get on-demand options
-    reserved_options = get_options_list(terms.get('Reserved', {}), service_offer)  # Get reserved options
+def get_product_label(x):
+    return get_attributes_label(x.attributes) or x.name or 'Unknown Product'
+
+def get_family_choices(options):
+    labels = {}  # Attribute label per SKU, keyed by its shared attributes dict
+    choices = []  # (label, key) pairs for the menu
+    for x in options:  # Iterate through options in the family
+        attrs_id = id(x.attributes)  # Options of the same SKU share one attributes dict
+        if attrs_id not in labels:  # Format each SKU's label once
+            labels[attrs_id] = get_attributes_label(x.attributes)
+        choices.append((labels[attrs_id] or x.name or 'Unknown Product', x.key))  # Fall back to the option name
+
+    counts = Counter(label for label, _ in choices)  # Count how often each label appears
+    return sorted((f"{label} ({key})" if counts[label] > 1 else label, key) for label, key in choices)  # Tell duplicate labels apart by rate code
+
+def index_options(options):
+    by_family = defaultdict(list)  # Options grouped by product family
+    for option in options:  # Iterate through options once
+        by_family[option.product_family].append(option)  # Add option to its family
+    by_key = {option.key: option for option in options}  # Options keyed by rate code
+    return by_family, by_key  # Return both indexes
+
+def prompt_service_form(service_options, service):
+    ondemand_options = service_options['OnDemand']  # Get on-demand options
+    reserved_options = service_options['Reserved']  # Get reserved options
+    option_indexes = {  # Build lookup indexes once per service
+        'OnDemand': index_options(ondemand_options),  # On-demand family and key indexes
+        'Reserved': index_options(reserved_options),  # Reserved family and key indexes
+    }
+    labels_by_family = {}  # Sorted (label, key) choices per pricing model and family
 
     style_options = [  # Create pricing model options
         'OnDemand' if len(ondemand_options) > 1 else None,  # Add on-demand if available
@@ -134,14 +379,12 @@ def prompt_service_form(service_offer, service):
     while True:  # Loop until done
         selected_style = inquirer.prompt(styles)  # Get pricing model selection
 
-        if selected_style and selected_style['style'] == 'OnDemand':  # If on-demand selected
-            choices = ondemand_options  # Use on-demand options
-        elif selected_style and selected_style['style'] == 'Reserved':  # If reserved selected
-            choices = reserved_options  # Use reserved options
+        if selected_style and selected_style['style'] in option_indexes:  # If a pricing model selected
+            by_family, by_key = option_indexes[selected_style['style']]  # Use indexes for selected model
         else:
             return calculations  # Return calculations if done
 
-        prod_families = sorted(set([x.get('productFamily') for x in choices if x.get('productFamily') is not None]))  # Get product families
+        prod_families = sorted(by_family)  # Get product families
         prod_families.append(('<- back', '<- back'))  # Add back option
 
         family_options = [  # Create product family selection prompt
@@ -154,9 +397,10 @@ def prompt_service_form(service_offer, service):
 
         choosen_family = inquirer.prompt(family_options)  # Get family selection
         if choosen_family and choosen_family['family'] != '<- back':  # If family selected
-            type_choices = list(filter(lambda x: x.get('productFamily') == choosen_family['family'], choices))  # Filter by family
-            selected_type_choices = sorted([(get_product_label(x), x['key']) for x in type_choices])  # Format choices
-            selected_type_choices.append(('<- back', '<- back'))  # Add back option
+            label_key = (selected_style['style'], choosen_family['family'])  # Cache key for this menu
+            if label_key not in labels_by_family:  # Format choices the first time the family is opened
+                labels_by_family[label_key] = get_family_choices(by_family[choosen_family['family']])
+            selected_type_choices = labels_by_family[label_key] + [('<- back', '<- back')]  # Add back option
 
             pricing_options = [  # Create product selection prompt
                 inquirer.List('type',
@@ -171,11 +415,10 @@ def prompt_service_form(service_offer, service):
             choosen_pricing = inquirer.prompt(pricing_options)  # Get product selection
 
             if choosen_pricing and choosen_pricing['type'] != '<- back':  # If product selected
-                choosen_items = list(filter(lambda x: x['key'] == choosen_pricing['type'], choices))  # Get selected item
-                choosen_item = choosen_items[0] if choosen_items else None  # Get first matching item
+                choosen_item = by_key.get(choosen_pricing['type'])  # Look up selected item
                 if choosen_item:  # If item found
                     questions = [  # Create quantity prompt
-                        inquirer.Text('value', message=f'{choosen_item["productFamily"]} - How many {choosen_item["unit"]}?'),  # Prompt message
+                        inquirer.Text('value', message=f'{choosen_item.product_family} - How many {choosen_item.unit}?'),  # Prompt message
                     ]
 
                     answers = inquirer.prompt(questions)  # Get quantity
@@ -185,38 +428,54 @@ def prompt_service_form(service_offer, service):
                             'service': service,  # Service name
                             'type': selected_style['style'],  # Pricing type
                             'family': choosen_family['family'],  # Product family
-                            'value': float(answers['value']) * float(choosen_item['price']),  # Calculate cost
+                            'value': float(answers['value']) * float(choosen_item.price),  # Calculate cost
                         })
 
 def print_summary(total_expenses):
-    flatten_items = [item for items in total_expenses for item in items]  # Flatten nested list
-    if flatten_items:  # If items exist
-        df = pd.DataFrame(data=flatten_items)  # Create DataFrame
-        print(df.groupby(["service", "type"]).sum())  # Print summary by service and type
+    totals = defaultdict(float)  # Cost per service and pricing type
+    grand_total = 0.0  # Sum of all costs
+    for items in total_expenses:  # Iterate through service calculations
+        for item in items:  # Iterate through line items
+            totals[(item['service'], item['type'])] += item['value']  # Add cost to its group
+            grand_total += item['value']  # Add cost to grand total
+
+    if totals:  # If items exist
+        for (service, style), value in sorted(totals.items()):  # Print summary by service and type
+            print(f"{service:25} {style:10} {value:12.4f}")
         print("---------------------------------------")  # Print separator
-        print("Grand Total: USD", format(df["value"].sum(), 'f'))  # Print total cost
+        print("Grand Total: USD", format(grand_total, 'f'))  # Print total cost
 
 def execute_routine(offers):
-    services = sorted([x for x in offers])  # Get sorted list of services
     service = None  # Initialize service
     region = prompt_region()  # Get region selection
     if region:  # If region selected
-        services.append(DONE_ITEM)  # Add done option
+        services = (*sorted(offers), DONE_ITEM)  # Sorted services plus done option
+        question = service_question(services, lambda answers: service)  # Build prompt once, defaulting to the last service
+        loaded_services = prefetch_regional_services(region, offers, PREFETCH_SERVICES)  # Download popular services up front
         total_expenses = []  # Initialize expenses list
         while True:  # Loop until done
-            service = prompt_service(services, service)  # Get service selection
+            service = prompt_service(question)  # Get service selection
             if (service and service != DONE_ITEM):  # If service selected
                 offer = offers[service]  # Get service offer
-                service_offer = get_regional_service(region, offer)  # Get regional pricing
-                if (service_offer):  # If pricing available
-                    total_expenses.append(prompt_service_form(service_offer, service))  # Get service calculations
+                service_options = loaded_services.get(service) or get_regional_service(region, offer)  # Get regional pricing
+                if (service_options):  # If pricing available
+                    loaded_services[service] = service_options  # Reuse options if the service is picked again
+                    total_expenses.append(prompt_service_form(service_options, service))  # Get service calculations
             else:
                 break  # Exit loop if done
 
         print_summary(total_expenses)  # Print cost summary
 
-offers = load_offers()  # Load AWS service offerings
-if offers:  # If offerings loaded
-    execute_routine(offers)  # Start cost estimation
-else:
-    print("Could not fetch offers!")  # Show error message
\ No newline at end of file
+if __name__ == '__main__':  # Run only when executed as a script
+    parser = argparse.ArgumentParser(description='Estimate AWS costs from the public pricing API')  # Create argument parser
+    parser.add_argument('--prefetch', action='store_true', help='Cache the region index of every service and exit')  # Cache warm-up mode
+    args = parser.parse_args()  # Parse command line arguments
+
+    offers = load_offers()  # Load AWS service offerings
+    if offers and args.prefetch:  # If only warming the cache
+        cached = prefetch_region_indexes(offers)  # Cache every region index
+        print(f"Cached {cached} of {len(offers)} region indexes")  # Show cache summary
+    elif offers:  # If offerings loaded
+        execute_routine(offers)  # Start cost estimation
+    else:
+        print("Could not fetch offers!")  # Show error message
\ No newline at end of file
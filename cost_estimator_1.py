@@ -1,42 +1,47 @@
-import boto3
-import json
+import hashlib
+import logging
+import math
+import orjson
 import os
 from dotenv import load_dotenv
+from utils import create_pricing_client
 import re
+import io
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache, wraps
+from types import MappingProxyType
 
 # Load environment variables (if needed for AWS credentials or region)
 load_dotenv()
 
-# Debug: Print loaded AWS credentials (masked)
 access_key = os.getenv("AWS_ACCESS_KEY_ID", "")
 secret_key = os.getenv("AWS_SECRET_ACCESS_KEY", "")
-region = os.getenv("AWS_REGION", "")
-print(f"\nAWS Credentials loaded:")
-print(f"Access Key ID: {access_key[:4]}...{access_key[-4:] if access_key else 'Not found'}")
-print(f"Secret Key: {'*' * 20}{secret_key[-4:] if secret_key else 'Not found'}")
-print(f"Region: {region}\n")
 
-# --- Configuration ---
-# Region for Pricing API endpoint (must be 'us-east-1')
-PRICING_API_REGION = "us-east-1"  # AWS Pricing API is only available in us-east-1
+logger = logging.getLogger(__name__)
+
+# Debug: Log loaded AWS credentials (masked); only when debug logging is on, not on every import
+if logger.isEnabledFor(logging.DEBUG):
+    logger.debug("AWS credentials loaded: access key %s...%s, secret key %s%s, region %s",
+                 access_key[:4], access_key[-4:] if access_key else 'Not found',
+                 '*' * 20, secret_key[-4:] if secret_key else 'Not found',
+                 os.getenv("AWS_REGION", ""))
 
+# --- Configuration ---
 # Default AWS region for pricing lookup if not specified in component
 DEFAULT_AWS_REGION = os.getenv("AWS_REGION", "ap-south-1") 
 
-# Initialize AWS session with credentials
-session = boto3.Session(
-    aws_access_key_id=access_key,
-    aws_secret_access_key=secret_key,
-    region_name=PRICING_API_REGION
-)
-
-# Initialize Boto3 client for the Pricing API using the session
-pricing_client = session.client('pricing')
+def get_pricing_client():
+    """Return the shared Pricing API client for the credentials loaded from the environment."""
+    return create_pricing_client(access_key, secret_key)
 
 # Mapping from AWS region code to Pricing API location description
 # Add more regions as needed
-REGION_MAP = {
+REGION_MAP = MappingProxyType({
     "us-east-1": "US East (N. Virginia)",
     "us-east-2": "US East (Ohio)",
     "us-west-1": "US West (N. California)",
@@ -52,88 +57,615 @@ REGION_MAP = {
     "eu-west-2": "EU (London)",
     "eu-west-3": "EU (Paris)",
     "sa-east-1": "South America (Sao Paulo)",
-}
+})
+
+# Resolves either a region code or an already-resolved location name (as the
+# architecture JSON uses) to the Pricing API location
+PRICING_LOCATIONS = MappingProxyType({
+    **REGION_MAP,
+    **{location: location for location in REGION_MAP.values()}
+})
 
 HOURS_PER_MONTH = 730 # Average hours in a month
 GB_TO_MB = 1024
 
+# Nodes priced concurrently; each node's Pricing API calls are I/O bound
+PRICING_WORKERS = 16
+
+# Output buffer of the node handler running on the current worker thread
+thread_output = threading.local()
+
+def print_problem(message):
+    """Print a skip or error message; unlike the breakdown it is still shown when verbose is off."""
+    buffer = getattr(thread_output, 'buffer', None)
+    print(message, file=getattr(buffer, 'problems', sys.stdout))
+
+# Stay under the Pricing API request quota so concurrent lookups never hit throttling backoff
+PRICING_REQUESTS_PER_SECOND = 10
+
+class RateLimiter:
+    """Token bucket shared by every thread that calls the Pricing API."""
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request token is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+pricing_limiter = RateLimiter(PRICING_REQUESTS_PER_SECOND)
+
+def warm_pricing_client():
+    """Build the Pricing API client and open its first HTTPS connection ahead of the real lookups."""
+    try:
+        pricing_limiter.acquire()
+        get_pricing_client().describe_services(ServiceCode='AmazonEC2', MaxResults=1)
+    except Exception as e:
+        # Only a head start; the first real lookup reports any actual problem
+        logger.debug("Pricing client warm-up failed: %s", e)
+
+# Number with an optional size unit, e.g. '100GB', '2 TB', '512'
+SIZE_PATTERN = re.compile(r"(\d+\.?\d*)\s*([KMGT]B)?", re.IGNORECASE)
+STORAGE_UNIT_TO_GB = {'TB': GB_TO_MB, 'GB': 1, 'MB': 1 / GB_TO_MB, 'KB': 1 / (GB_TO_MB * GB_TO_MB), None: 1}
+MEMORY_UNIT_TO_MB = {'TB': GB_TO_MB * GB_TO_MB, 'GB': GB_TO_MB, 'MB': 1, 'KB': 1 / GB_TO_MB, None: 1}
+
 def parse_storage_size(size_str):
     """Parses strings like '100GB', '500MB', '2TB' into GB."""
-    if isinstance(size_str, (int, float)): # Already a number (assume GB)
-        return float(size_str)
-    if not isinstance(size_str, str):
+    # Exact type check first: strings are the common case and skip both isinstance calls
+    if type(size_str) is not str:
+        if isinstance(size_str, (int, float)): # Already a number (assume GB)
+            return float(size_str)
         return None
-        
-    size_str = size_str.upper().strip()
-    value = re.findall(r"\d+\.?\d*", size_str)
-    if not value:
-        return None
-    num = float(value[0])
 
-    if 'TB' in size_str:
-        return num * GB_TO_MB
-    elif 'MB' in size_str:
-        return num / GB_TO_MB
-    elif 'GB' in size_str:
-        return num
-    else: # Assume GB if no unit
-        return num
+    # Fast path for the common '100GB' / '50' forms: check the two-character suffix only
+    text = size_str.strip()
+    unit = text[-2:].upper()
+    try:
+        if unit in STORAGE_UNIT_TO_GB:
+            return float(text[:-2]) * STORAGE_UNIT_TO_GB[unit]
+        return float(text)
+    except ValueError:
+        pass
+
+    match = SIZE_PATTERN.search(size_str)
+    if not match:
+        return None
+    unit = match.group(2)
+    # Assume GB if no unit
+    return float(match.group(1)) * STORAGE_UNIT_TO_GB[unit.upper() if unit else None]
 
 def parse_memory_size(memory_str):
     """Parse memory size string (e.g., '256MB') to float value in MB"""
-    if isinstance(memory_str, (int, float)):
-        return float(memory_str)
-    memory_str = str(memory_str).upper()
-    if memory_str.endswith('MB'):
-        return float(memory_str[:-2])
-    if memory_str.endswith('GB'):
-        return float(memory_str[:-2]) * 1024
-    return float(memory_str)
+    if type(memory_str) is not str:
+        if isinstance(memory_str, (int, float)):
+            return float(memory_str)
+        memory_str = str(memory_str)
+    text = memory_str.strip()
+    unit = text[-2:].upper()
+    try:
+        if unit in MEMORY_UNIT_TO_MB:
+            return float(text[:-2]) * MEMORY_UNIT_TO_MB[unit]
+        return float(text)
+    except ValueError:
+        pass
+    match = SIZE_PATTERN.fullmatch(text)
+    if not match:
+        raise ValueError(f"Invalid memory size: {memory_str}")
+    unit = match.group(2)
+    return float(match.group(1)) * MEMORY_UNIT_TO_MB[unit.upper() if unit else None]
 
 def get_location_from_region(region_code):
-    """Maps an AWS region code to its Pricing API location name."""
-    return REGION_MAP.get(region_code, f"Region not mapped: {region_code}")
+    """Maps an AWS region code (or an already-resolved location name) to its Pricing API location, or None."""
+    return PRICING_LOCATIONS.get(region_code)
+
+def first_price_dimension(price_list):
+    """Return the first on-demand price dimension of a Pricing API product document."""
+    # On-demand products carry a single term with a single dimension, so stop at the
+    # first value of each dict instead of walking them or building next(iter(...)) chains
+    for term in price_list['terms']['OnDemand'].values():
+        for price_dimension in term['priceDimensions'].values():
+            return price_dimension
+    raise KeyError('priceDimensions')
+
+# --- Persistent Price Cache ---
+# List prices change over days, not minutes, so fetched prices are kept on disk between runs
+# Kept per user, next to the pricing documents cost-cal.py caches, so no other account can plant prices
+PRICE_CACHE_PATH = os.getenv(
+    "AWS_PRICING_CACHE",
+    os.path.join(os.path.expanduser('~'), '.cache', 'aws-pricing', 'estimator-prices.json')
+)
+PRICE_CACHE_TTL = 24 * 60 * 60  # seconds
+
+price_cache = None  # hashed key -> [stored_at, value]; read from disk on first use
+price_cache_dirty = False
+price_cache_lock = threading.Lock()
 
-def format_currency(amount):
-    """Format currency with thousand separators and 2 decimal places."""
-    return f"${amount:,.2f}"
+def is_cache_entry(entry):
+    """Check that a cache entry has the [stored_at, value] shape this module writes."""
+    return (isinstance(entry, list) and len(entry) == 2
+            and isinstance(entry[0], (int, float)) and not isinstance(entry[0], bool))
 
-def format_number(number):
-    """Format numbers with thousand separators."""
-    return f"{number:,}"
+def load_price_cache():
+    """Read the price cache file, treating a missing or unreadable file as empty.
+
+    Anything that is not a dict of [stored_at, value] entries is dropped and the
+    cache is marked changed, so the next save overwrites the bad file.
+    """
+    global price_cache_dirty
+    try:
+        with open(PRICE_CACHE_PATH, 'rb') as f:
+            entries = orjson.loads(f.read())
+    except FileNotFoundError:
+        return {}
+    except (OSError, orjson.JSONDecodeError):
+        price_cache_dirty = True
+        return {}
+
+    if not isinstance(entries, dict):
+        price_cache_dirty = True
+        return {}
+    valid_entries = {key: entry for key, entry in entries.items() if is_cache_entry(entry)}
+    if len(valid_entries) != len(entries):
+        price_cache_dirty = True
+    return valid_entries
+
+def disk_cached(fetch):
+    """Keep fetch's results in the price cache, keyed by its name and arguments; None results are not stored."""
+    @wraps(fetch)
+    def cached_fetch(*args):
+        global price_cache, price_cache_dirty
+        key = hashlib.blake2b(orjson.dumps([fetch.__name__, args]), digest_size=16).hexdigest()
+        with price_cache_lock:
+            if price_cache is None:
+                price_cache = load_price_cache()
+            entry = price_cache.get(key)
+        if entry is not None and time.time() - entry[0] < PRICE_CACHE_TTL:
+            return entry[1]
+
+        value = fetch(*args)
+        if value is not None:
+            with price_cache_lock:
+                price_cache[key] = [time.time(), value]
+                price_cache_dirty = True
+        return value
+    return cached_fetch
+
+def save_price_cache():
+    """Write the price cache back to disk, dropping expired entries, if this run added anything."""
+    global price_cache_dirty
+    with price_cache_lock:
+        if not price_cache_dirty:
+            return
+        now = time.time()
+        live_entries = {key: entry for key, entry in price_cache.items() if now - entry[0] < PRICE_CACHE_TTL}
+        price_cache_dirty = False
+
+    # Write to a private, unpredictably named temporary file first so a concurrent run
+    # never reads a half-written cache and nobody can swap the file in between
+    cache_dir = os.path.dirname(PRICE_CACHE_PATH) or '.'
+    temp_path = None
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=cache_dir, prefix='.prices-', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(orjson.dumps(live_entries, option=orjson.OPT_NON_STR_KEYS))
+        os.replace(temp_path, PRICE_CACHE_PATH)
+    except OSError as e:
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+        print_problem(f"Error saving price cache to {PRICE_CACHE_PATH}: {str(e)}")
+
+# Lookups currently being fetched, so concurrent nodes asking for the same price wait on one call
+pending_lookups = {}
+pending_lookups_lock = threading.Lock()
+
+def run_once(key, fetch):
+    """Call fetch() for key, making concurrent callers with the same key wait on that one call."""
+    with pending_lookups_lock:
+        lookup = pending_lookups.get(key)
+        is_owner = lookup is None
+        if is_owner:
+            lookup = pending_lookups[key] = Future()
+
+    if is_owner:
+        try:
+            lookup.set_result(fetch())
+        except Exception as e:
+            lookup.set_exception(e)
+        finally:
+            with pending_lookups_lock:
+                del pending_lookups[key]
+
+    return lookup.result()
 
 def get_product_price(service_code, filters):
     """Get the price for a product using AWS Pricing API."""
+    # Identical filter sets (e.g. several nodes of the same instance type) share one lookup
+    filter_key = tuple(sorted((f['Field'], f['Value']) for f in filters))
     try:
-        print(f"\nDebug - Raw price data for {service_code}:")
-        response = pricing_client.get_products(
-            ServiceCode=service_code,
-            Filters=filters,
-            MaxResults=1
-        )
-        print(json.dumps(response, indent=2))
-        
-        if not response['PriceList']:
-            print(f"\nDebug - No price found for {service_code} with filters:")
-            print(json.dumps(filters, indent=2))
-            return 0
-            
-        price_list = json.loads(response['PriceList'][0])
-        print("\nDebug - Product attributes:")
-        print(json.dumps(price_list['product']['attributes'], indent=2))
-        
-        # Get the first price dimension
-        terms = price_list['terms']['OnDemand']
-        first_term = next(iter(terms.values()))
-        price_dimension = next(iter(first_term['priceDimensions'].values()))
-        print("\nDebug - Price dimension:")
-        print(json.dumps(price_dimension, indent=2))
-        
-        return float(price_dimension['pricePerUnit']['USD'])
+        return run_once((service_code, filter_key), lambda: lookup_product_price(service_code, filter_key))
     except Exception as e:
-        print(f"Error getting price for {service_code}: {str(e)}")
+        print_problem(f"Error getting price for {service_code}: {str(e)}")
         return 0
 
+# Services whose on-demand catalog for one location is small enough to fetch whole;
+# their lookups are then matched locally instead of costing a round trip each
+BULK_FETCH_SERVICES = frozenset({
+    'AWSLambda', 'AmazonS3', 'AmazonApiGateway', 'AmazonSNS', 'AmazonSQS',
+    'AWSELB', 'AmazonEFS', 'AmazonDynamoDB', 'AmazonVPC', 'AWSAccessAnalyzer'
+})
+
+@lru_cache(maxsize=64)
+def fetch_service_catalog(service_code, location):
+    """Fetch every on-demand product of a service in one location as (attributes, USD price) pairs."""
+    filters = [
+        {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+        {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'}
+    ]
+    products = []
+    for price_list in iter_price_lists(service_code, filters):
+        product = price_list['product']
+        # productFamily sits beside the attributes but is filtered on like one of them;
+        # values are casefolded because TERM_MATCH is case-insensitive
+        attributes = dict(product['attributes'], productFamily=product.get('productFamily', ''))
+        attributes = {field: str(value).casefold() for field, value in attributes.items()}
+        products.append((attributes, float(first_price_dimension(price_list)['pricePerUnit']['USD'])))
+    return tuple(products)
+
+def attribute_matches(attributes, field, value):
+    """Check one casefolded filter value against a catalog product's attributes."""
+    actual = attributes.get(field)
+    if actual == value:
+        return True
+    # Usage types carry a region prefix ('APS3-Topic' in Mumbai, 'Topic' in N. Virginia),
+    # so templates give them unprefixed and match whatever region the node is in
+    return field == 'usagetype' and actual is not None and actual.partition('-')[2] == value
+
+def match_catalog_price(products, filter_key):
+    """Return the price of the first catalog product matching every filter, or 0 if none does."""
+    # The catalog is already limited to on-demand terms, which are not a product attribute
+    wanted = [(field, str(value).casefold()) for field, value in filter_key if field != 'termType']
+    for attributes, price in products:
+        if all(attribute_matches(attributes, field, value) for field, value in wanted):
+            return price
+    logger.debug("No catalog product matches %s", filter_key)
+    return 0
+
+@lru_cache(maxsize=4096)
+@disk_cached
+def lookup_product_price(service_code, filter_key):
+    """Query the Pricing API for one (service, filters) key; errors propagate so they are not cached."""
+    location = dict(filter_key).get('location')
+    if service_code in BULK_FETCH_SERVICES and location:
+        products = run_once(('catalog', service_code, location),
+                            lambda: fetch_service_catalog(service_code, location))
+        return match_catalog_price(products, filter_key)
+
+    filters = [{'Type': 'TERM_MATCH', 'Field': field, 'Value': value} for field, value in filter_key]
+    pricing_limiter.acquire()
+    response = get_pricing_client().get_products(
+        ServiceCode=service_code,
+        Filters=filters,
+        MaxResults=1
+    )
+    # Serializing the raw response is expensive, so only do it when debug logging is on
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("Raw price data for %s:\n%s", service_code, orjson.dumps(response, option=orjson.OPT_INDENT_2).decode())
+    
+    if not response['PriceList']:
+        if debug:
+            logger.debug("No price found for %s with filters:\n%s", service_code, orjson.dumps(filters, option=orjson.OPT_INDENT_2).decode())
+        return 0
+        
+    price_list = orjson.loads(response['PriceList'][0])
+    if debug:
+        logger.debug("Product attributes:\n%s", orjson.dumps(price_list['product']['attributes'], option=orjson.OPT_INDENT_2).decode())
+    
+    price_dimension = first_price_dimension(price_list)
+    if debug:
+        logger.debug("Price dimension:\n%s", orjson.dumps(price_dimension, option=orjson.OPT_INDENT_2).decode())
+    
+    return float(price_dimension['pricePerUnit']['USD'])
+
+def iter_price_lists(service_code, filters):
+    """Yield every product document matching the filters, one rate-limited page of 100 at a time."""
+    request = {'ServiceCode': service_code, 'Filters': filters, 'MaxResults': 100}
+    while True:
+        pricing_limiter.acquire()
+        response = get_pricing_client().get_products(**request)
+        for item in response['PriceList']:
+            yield orjson.loads(item)
+        if not response.get('NextToken'):
+            return
+        request['NextToken'] = response['NextToken']
+
+# Distinct EC2 instance types in one (location, OS, tenancy) group before the
+# whole regional catalog is cheaper to page through than one lookup per type
+EC2_CATALOG_MIN_TYPES = 3
+
+# Prefetched {instance_type: hourly price} maps keyed by (location, OS, tenancy)
+ec2_catalogs = {}
+
+@disk_cached
+def prefetch_ec2_catalog(location, os_type, tenancy):
+    """Page through every on-demand EC2 price for one location/OS/tenancy and index it by instance type."""
+    filters = [
+        {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+        {'Type': 'TERM_MATCH', 'Field': 'operatingSystem', 'Value': os_type},
+        {'Type': 'TERM_MATCH', 'Field': 'tenancy', 'Value': tenancy},
+        # Sent to boto3 directly, which only accepts plain dicts
+        *(dict(f) for f in EC2_BASE_FILTERS)
+    ]
+    catalog = {}
+    try:
+        for price_list in iter_price_lists('AmazonEC2', filters):
+            price_dimension = first_price_dimension(price_list)
+            catalog.setdefault(price_list['product']['attributes']['instanceType'],
+                               float(price_dimension['pricePerUnit']['USD']))
+    except Exception as e:
+        print_problem(f"Error prefetching EC2 catalog for {location}: {str(e)}")
+        return None
+    return catalog
+
+def prefetch_ec2_catalogs(nodes):
+    """Prefetch EC2 catalogs for groups with enough distinct instance types to be worth a bulk fetch."""
+    groups = {}
+    for node in nodes:
+        if node.get('type') != 'AmazonEC2' or not node.get('InstanceType'):
+            continue
+        location = get_location_from_region(node.get('region', DEFAULT_AWS_REGION))
+        if location is None:
+            continue
+        key = (location, node.get('os', 'Linux'), node.get('tenancy', 'Shared'))
+        groups.setdefault(key, set()).add(node['InstanceType'])
+
+    keys = [key for key, instance_types in groups.items()
+            if len(instance_types) >= EC2_CATALOG_MIN_TYPES and key not in ec2_catalogs]
+    for key, catalog in zip(keys, lookup_executor.map(lambda key: prefetch_ec2_catalog(*key), keys)):
+        ec2_catalogs[key] = catalog or {}
+
+# Distinct RDS configurations for one (location, engine) before its catalog is
+# cheaper to page through than two lookups per configuration
+RDS_CATALOG_MIN_CONFIGS = 3
+
+# Prefetched RDS prices keyed by (location, engine): 'instances' maps
+# instanceType -> deploymentOption -> hourly USD, 'storage' maps volumeType to GB-month USD
+rds_catalogs = {}
+
+@disk_cached
+def prefetch_rds_catalog(location, engine):
+    """Page through every on-demand RDS price for one location and engine, splitting instances from storage."""
+    filters = [
+        {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+        {'Type': 'TERM_MATCH', 'Field': 'databaseEngine', 'Value': engine},
+        {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'}
+    ]
+    catalog = {'instances': {}, 'storage': {}}
+    try:
+        # Instance and storage rows come from the same stream; classify them by product family/group
+        for price_list in iter_price_lists('AmazonRDS', filters):
+            attributes = price_list['product']['attributes']
+            price = float(first_price_dimension(price_list)['pricePerUnit']['USD'])
+            if price_list['product'].get('productFamily') == 'Database Instance':
+                deployments = catalog['instances'].setdefault(attributes.get('instanceType'), {})
+                deployments.setdefault(attributes.get('deploymentOption'), price)
+            elif attributes.get('group') == 'RDS-Storage-Usage':
+                catalog['storage'].setdefault(attributes.get('volumeType'), price)
+    except Exception as e:
+        print_problem(f"Error prefetching RDS catalog for {engine} in {location}: {str(e)}")
+        return None
+    return catalog
+
+def prefetch_rds_catalogs(nodes):
+    """Prefetch RDS catalogs for (location, engine) groups with enough distinct configurations."""
+    groups = {}
+    for node in nodes:
+        if node.get('type') != 'AmazonRDS':
+            continue
+        location = get_location_from_region(node.get('region', DEFAULT_AWS_REGION))
+        if location is None:
+            continue
+        key = (location, node.get('engine', 'MySQL'))
+        groups.setdefault(key, set()).add((
+            node.get('InstanceType', 'db.t3.small'),
+            node.get('deployment', 'Single-AZ'),
+            node.get('storage_type', 'General Purpose')
+        ))
+
+    keys = [key for key, configs in groups.items()
+            if len(configs) >= RDS_CATALOG_MIN_CONFIGS and key not in rds_catalogs]
+    for key, catalog in zip(keys, lookup_executor.map(lambda key: prefetch_rds_catalog(*key), keys)):
+        rds_catalogs[key] = catalog or {'instances': {}, 'storage': {}}
+
+# Separate pool for a handler's own lookups so they never wait behind the node pool
+lookup_executor = ThreadPoolExecutor(max_workers=PRICING_WORKERS)
+
+def get_product_prices(*lookups):
+    """Fetch several (service_code, filters) prices concurrently, returned in the order given."""
+    buffer = getattr(thread_output, 'buffer', None)
+
+    def fetch(service_code, filters):
+        # Keep any output with the node that asked for the price
+        thread_output.buffer = buffer
+        try:
+            return get_product_price(service_code, filters)
+        finally:
+            thread_output.buffer = None
+
+    futures = [lookup_executor.submit(fetch, service_code, filters) for service_code, filters in lookups]
+    return [future.result() for future in futures]
+
+# --- Static Filter Parts ---
+# Filters that are identical for every node of a service, built once at import and
+# frozen so no handler can mutate a shared filter. Handlers append only their
+# node-specific fields (location, instance type, ...).
+
+def static_filter(field, value):
+    """Build a read-only TERM_MATCH filter for a fixed field value."""
+    return MappingProxyType({'Type': 'TERM_MATCH', 'Field': field, 'Value': value})
+
+ON_DEMAND_FILTER = static_filter('termType', 'OnDemand')
+
+# Shared by the per-type lookup and the bulk catalog so both price an instance from
+# the same product (capacity-reservation rows would otherwise race the plain ones)
+EC2_BASE_FILTERS = (
+    static_filter('preInstalledSw', 'NA'),
+    static_filter('capacitystatus', 'Used'),
+    ON_DEMAND_FILTER
+)
+RDS_INSTANCE_BASE_FILTERS = (ON_DEMAND_FILTER,)
+RDS_STORAGE_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('group', 'RDS-Storage-Usage')
+)
+S3_STORAGE_BASE_FILTERS = (ON_DEMAND_FILTER,)
+S3_REQUEST_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('group', 'S3-API-Tier1')
+)
+LAMBDA_REQUEST_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'Serverless'),
+    static_filter('group', 'AWS-Lambda-Requests')
+)
+LAMBDA_DURATION_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'Serverless'),
+    static_filter('group', 'AWS-Lambda-Duration')
+)
+APIGW_REQUEST_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'API Calls'),
+    static_filter('group', 'APIGateway-Requests'),
+    static_filter('requestType', 'REST'),
+    static_filter('usagetype', 'APIRequest'),
+    static_filter('operation', 'APICall'),
+    static_filter('servicecode', 'AmazonApiGateway'),
+    static_filter('servicename', 'Amazon API Gateway')
+)
+APIGW_CACHE_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'API Gateway Cache'),
+    static_filter('group', 'APIGateway-Cache'),
+    static_filter('cacheSize', '1.6'),
+    static_filter('usagetype', 'APICache'),
+    static_filter('operation', 'Cache'),
+    static_filter('servicecode', 'AmazonApiGateway'),
+    static_filter('servicename', 'Amazon API Gateway')
+)
+ASG_INSTANCE_BASE_FILTERS = (
+    static_filter('operatingSystem', 'Linux'),
+    static_filter('tenancy', 'Shared'),
+    ON_DEMAND_FILTER
+)
+VPC_NAT_GATEWAY_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'NAT Gateway')
+)
+VPC_ENDPOINT_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'VPC Endpoint')
+)
+DYNAMODB_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'DynamoDB')
+)
+EBS_STORAGE_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'Storage')
+)
+SNS_DELIVERY_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'Message Delivery'),
+    static_filter('usagetype', 'DeliveryAttempts'),
+    static_filter('group', 'MessageDelivery'),
+    static_filter('operation', 'Delivery'),
+    static_filter('servicecode', 'AmazonSNS'),
+    static_filter('servicename', 'Amazon Simple Notification Service')
+)
+SNS_TOPIC_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'Topic'),
+    static_filter('usagetype', 'Topic'),
+    static_filter('group', 'Topic'),
+    static_filter('operation', 'Topic'),
+    static_filter('servicecode', 'AmazonSNS'),
+    static_filter('servicename', 'Amazon Simple Notification Service')
+)
+ELB_HOURLY_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'Load Balancer'),
+    static_filter('loadBalancerType', 'Application'),
+    static_filter('group', 'LoadBalancer'),
+    static_filter('usagetype', 'LoadBalancerUsage'),
+    static_filter('operation', 'LoadBalancer'),
+    static_filter('servicecode', 'AWSELB'),
+    static_filter('servicename', 'AWS Elastic Load Balancing')
+)
+ELB_LCU_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'Load Balancer'),
+    static_filter('loadBalancerType', 'Application'),
+    static_filter('group', 'LCU'),
+    static_filter('usagetype', 'LCUUsage'),
+    static_filter('operation', 'LCU'),
+    static_filter('servicecode', 'AWSELB'),
+    static_filter('servicename', 'AWS Elastic Load Balancing')
+)
+EFS_STORAGE_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'Storage'),
+    static_filter('storageClass', 'General Purpose'),
+    static_filter('group', 'Storage'),
+    static_filter('usagetype', 'StorageUsage'),
+    static_filter('operation', 'Storage'),
+    static_filter('servicecode', 'AmazonEFS'),
+    static_filter('servicename', 'Amazon Elastic File System')
+)
+EFS_IO_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'Storage'),
+    static_filter('storageClass', 'General Purpose'),
+    static_filter('group', 'IO'),
+    static_filter('usagetype', 'IOUsage'),
+    static_filter('operation', 'IO'),
+    static_filter('servicecode', 'AmazonEFS'),
+    static_filter('servicename', 'Amazon Elastic File System')
+)
+SQS_REQUEST_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'Message Queue'),
+    static_filter('group', 'API-Request'),
+    static_filter('usagetype', 'Request'),
+    static_filter('operation', 'Request'),
+    static_filter('servicecode', 'AmazonSQS'),
+    static_filter('servicename', 'Amazon Simple Queue Service'),
+    static_filter('queueType', 'Standard')
+)
+IAM_ANALYZER_BASE_FILTERS = (
+    ON_DEMAND_FILTER,
+    static_filter('productFamily', 'IAM Access Analyzer'),
+    static_filter('group', 'Analyzer'),
+    static_filter('usagetype', 'AnalyzerUsage'),
+    static_filter('operation', 'Analyzer'),
+    static_filter('servicecode', 'AWSAccessAnalyzer'),
+    static_filter('servicename', 'AWS IAM Access Analyzer'),
+    static_filter('analyzerType', 'Standard')
+)
+
 # --- Service Specific Handlers ---
 
 def estimate_ec2_cost(node):
@@ -148,12 +680,12 @@ def estimate_ec2_cost(node):
     quantity = node.get('quantity', 1)
     
     if not instance_type:
-        print(f"Skipping EC2 cost for '{component_name}': Missing 'InstanceType' field.")
+        print_problem(f"Skipping EC2 cost for '{component_name}': Missing 'InstanceType' field.")
         return 0.0
 
     location = get_location_from_region(region)
-    if "not mapped" in location:
-        print(f"Skipping EC2 cost for '{component_name}' in unmapped region: {region}")
+    if location is None:
+        print_problem(f"Skipping EC2 cost for '{component_name}' in unmapped region: {region}")
         return 0.0
 
     filters = [
@@ -161,13 +693,13 @@ def estimate_ec2_cost(node):
         {'Type': 'TERM_MATCH', 'Field': 'instanceType', 'Value': instance_type},
         {'Type': 'TERM_MATCH', 'Field': 'operatingSystem', 'Value': os_type},
         {'Type': 'TERM_MATCH', 'Field': 'tenancy', 'Value': tenancy},
-        {'Type': 'TERM_MATCH', 'Field': 'preInstalledSw', 'Value': 'NA'},
-        {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'}
+        *EC2_BASE_FILTERS
     ]
     
-    price_data = get_product_price('AmazonEC2', filters)
+    catalog = ec2_catalogs.get((location, os_type, tenancy), {})
+    price_data = catalog[instance_type] if instance_type in catalog else get_product_price('AmazonEC2', filters)
     if not price_data:
-        print(f"Could not get price for EC2 '{component_name}': {instance_type} in {location}")
+        print_problem(f"Could not get price for EC2 '{component_name}': {instance_type} in {location}")
         return 0.0
 
     hourly_price = price_data
@@ -179,9 +711,9 @@ def estimate_ec2_cost(node):
     print(f"  ├─ Region: {region}")
     print(f"  ├─ Tenancy: {tenancy}")
     print(f"  ├─ Quantity: {quantity}")
-    print(f"  ├─ Hourly Rate: {format_currency(hourly_price)}")
+    print(f"  ├─ Hourly Rate: ${hourly_price:,.2f}")
     print(f"  ├─ Hours per Month: {HOURS_PER_MONTH}")
-    print(f"  └─ Monthly Cost: {format_currency(hourly_price * HOURS_PER_MONTH * quantity)}")
+    print(f"  └─ Monthly Cost: ${hourly_price * HOURS_PER_MONTH * quantity:,.2f}")
     
     return hourly_price * HOURS_PER_MONTH * quantity
 
@@ -190,24 +722,28 @@ def estimate_s3_cost(node):
     storage_class = node.get('storageClass', 'Standard')
     storage_size = float(node.get('storageSize', 150))  # in GB
     monthly_requests = int(node.get('monthlyRequests', 10000))
-    location = "Asia Pacific (Mumbai)" if region == "ap-south-1" else region
+    location = get_location_from_region(region)
+    if location is None:
+        print_problem(f"Skipping S3 cost for '{node.get('name', 'Unnamed')}' in unmapped region: {region}")
+        return 0.0
 
     # Get storage price
     storage_filters = [
         {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
-        {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-        {'Type': 'TERM_MATCH', 'Field': 'volumeType', 'Value': storage_class}
+        {'Type': 'TERM_MATCH', 'Field': 'volumeType', 'Value': storage_class},
+        *S3_STORAGE_BASE_FILTERS
     ]
-    storage_price = get_product_price('AmazonS3', storage_filters)
-    storage_cost = storage_price * storage_size if storage_price else 0
 
     # Get request price
     request_filters = [
         {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
-        {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-        {'Type': 'TERM_MATCH', 'Field': 'group', 'Value': 'S3-API-Tier1'}
+        *S3_REQUEST_BASE_FILTERS
     ]
-    request_price = get_product_price('AmazonS3', request_filters)
+    storage_price, request_price = get_product_prices(
+        ('AmazonS3', storage_filters),
+        ('AmazonS3', request_filters)
+    )
+    storage_cost = storage_price * storage_size if storage_price else 0
     request_cost = (request_price * monthly_requests / 1000) if request_price else 0
 
     total_cost = storage_cost + request_cost
@@ -216,10 +752,10 @@ def estimate_s3_cost(node):
     print(f"  ├─ Storage Class: {storage_class}")
     print(f"  ├─ Region: {region}")
     print(f"  ├─ Storage Size: {storage_size}GB")
-    print(f"  ├─ Estimated Monthly Requests: {format_number(monthly_requests)}")
-    print(f"  ├─ Request Rate: {format_currency(request_price)}/1000 requests" if request_price else "  ├─ Request Rate: Unknown")
-    print(f"  ├─ Request Monthly Cost: {format_currency(request_cost)}")
-    print(f"  └─ Total Monthly Cost: {format_currency(total_cost)}")
+    print(f"  ├─ Estimated Monthly Requests: {monthly_requests:,}")
+    print(f"  ├─ Request Rate: ${request_price:,.2f}/1000 requests" if request_price else "  ├─ Request Rate: Unknown")
+    print(f"  ├─ Request Monthly Cost: ${request_cost:,.2f}")
+    print(f"  └─ Total Monthly Cost: ${total_cost:,.2f}")
 
     return total_cost
 
@@ -233,7 +769,10 @@ def estimate_lambda_cost(node):
         avg_duration = float(node.get('AverageDuration', 100)) / 1000  # Convert ms to seconds
         
         # Convert region code to location name
-        location = "Asia Pacific (Mumbai)" if region == "ap-south-1" else region
+        location = get_location_from_region(region)
+        if location is None:
+            print_problem(f"Skipping Lambda cost for '{node.get('Name', 'Unnamed')}' in unmapped region: {region}")
+            return 0
         
         # Calculate GB-seconds
         gb_seconds = (memory / 1024) * (avg_duration * monthly_requests)
@@ -241,20 +780,18 @@ def estimate_lambda_cost(node):
         # Get request price
         request_filters = [
             {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'Serverless'},
-            {'Type': 'TERM_MATCH', 'Field': 'group', 'Value': 'AWS-Lambda-Requests'}
+            *LAMBDA_REQUEST_BASE_FILTERS
         ]
-        request_price = get_product_price('AWSLambda', request_filters)
         
         # Get duration price
         duration_filters = [
             {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'Serverless'},
-            {'Type': 'TERM_MATCH', 'Field': 'group', 'Value': 'AWS-Lambda-Duration'}
+            *LAMBDA_DURATION_BASE_FILTERS
         ]
-        duration_price = get_product_price('AWSLambda', duration_filters)
+        request_price, duration_price = get_product_prices(
+            ('AWSLambda', request_filters),
+            ('AWSLambda', duration_filters)
+        )
         
         # Calculate costs (convert request price from per million to per request)
         request_cost = (monthly_requests / 1000000) * request_price if request_price else 0
@@ -265,20 +802,20 @@ def estimate_lambda_cost(node):
         print(f"  ├─ Memory: {memory:.1f}MB")
         print(f"  ├─ Architecture: {architecture}")
         print(f"  ├─ Region: {region}")
-        print(f"  ├─ Monthly Requests: {format_number(monthly_requests)}")
+        print(f"  ├─ Monthly Requests: {monthly_requests:,}")
         print(f"  ├─ Avg. Duration: {avg_duration*1000:.0f}ms")
-        print(f"  ├─ Computed GB-seconds: {format_number(gb_seconds)}")
+        print(f"  ├─ Computed GB-seconds: {gb_seconds:,}")
         if request_price:
-            print(f"  ├─ Request Rate: {format_currency(request_price)}/million requests")
-            print(f"  ├─ Request Cost: {format_currency(request_cost)}")
+            print(f"  ├─ Request Rate: ${request_price:,.2f}/million requests")
+            print(f"  ├─ Request Cost: ${request_cost:,.2f}")
         if duration_price:
-            print(f"  ├─ Duration Rate: {format_currency(duration_price)}/GB-second")
-            print(f"  ├─ Duration Cost: {format_currency(duration_cost)}")
-        print(f"  └─ Total Monthly Cost: {format_currency(total_cost)}")
+            print(f"  ├─ Duration Rate: ${duration_price:,.2f}/GB-second")
+            print(f"  ├─ Duration Cost: ${duration_cost:,.2f}")
+        print(f"  └─ Total Monthly Cost: ${total_cost:,.2f}")
         
         return total_cost
     except Exception as e:
-        print(f"Error estimating Lambda cost: {str(e)}")
+        print_problem(f"Error estimating Lambda cost: {str(e)}")
         return 0
 
 def estimate_rds_cost(node):
@@ -295,6 +832,9 @@ def estimate_rds_cost(node):
     quantity = node.get('quantity', 1)
     
     location = get_location_from_region(region)
+    if location is None:
+        print_problem(f"Skipping RDS cost for '{component_name}' in unmapped region: {region}")
+        return 0.0
     
     # Get instance price
     instance_filters = [
@@ -302,23 +842,27 @@ def estimate_rds_cost(node):
         {'Type': 'TERM_MATCH', 'Field': 'instanceType', 'Value': instance_type},
         {'Type': 'TERM_MATCH', 'Field': 'databaseEngine', 'Value': engine},
         {'Type': 'TERM_MATCH', 'Field': 'deploymentOption', 'Value': deployment},
-        {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'}
+        *RDS_INSTANCE_BASE_FILTERS
     ]
     
-    instance_price_data = get_product_price('AmazonRDS', instance_filters)
-    hourly_price = instance_price_data
-    
     # Get storage price
     storage_filters = [
         {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
         {'Type': 'TERM_MATCH', 'Field': 'volumeType', 'Value': storage_type},
         {'Type': 'TERM_MATCH', 'Field': 'databaseEngine', 'Value': engine},
-        {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-        {'Type': 'TERM_MATCH', 'Field': 'group', 'Value': 'RDS-Storage-Usage'}
+        *RDS_STORAGE_BASE_FILTERS
     ]
     
-    storage_price_data = get_product_price('AmazonRDS', storage_filters)
-    storage_price = storage_price_data
+    catalog = rds_catalogs.get((location, engine), {})
+    deployments = catalog.get('instances', {}).get(instance_type, {})
+    if deployment in deployments and storage_type in catalog.get('storage', {}):
+        hourly_price = deployments[deployment]
+        storage_price = catalog['storage'][storage_type]
+    else:
+        hourly_price, storage_price = get_product_prices(
+            ('AmazonRDS', instance_filters),
+            ('AmazonRDS', storage_filters)
+        )
     
     # Calculate costs
     instance_monthly = hourly_price * HOURS_PER_MONTH * quantity
@@ -334,46 +878,41 @@ def estimate_rds_cost(node):
     print(f"  ├─ Storage: {storage_size}GB {storage_type}")
     print(f"  ├─ Quantity: {quantity}")
     if hourly_price:
-        print(f"  ├─ Instance Hourly Rate: {format_currency(hourly_price)}")
-        print(f"  ├─ Instance Monthly Cost: {format_currency(instance_monthly)}")
+        print(f"  ├─ Instance Hourly Rate: ${hourly_price:,.2f}")
+        print(f"  ├─ Instance Monthly Cost: ${instance_monthly:,.2f}")
     if storage_price:
-        print(f"  ├─ Storage Rate (per GB-month): {format_currency(storage_price)}")
-        print(f"  ├─ Storage Monthly Cost: {format_currency(storage_monthly)}")
-    print(f"  └─ Total Monthly Cost: {format_currency(total_monthly)}")
+        print(f"  ├─ Storage Rate (per GB-month): ${storage_price:,.2f}")
+        print(f"  ├─ Storage Monthly Cost: ${storage_monthly:,.2f}")
+    print(f"  └─ Total Monthly Cost: ${total_monthly:,.2f}")
     
     return total_monthly
 
 def estimate_api_gateway_cost(component):
     try:
         region = component.get('Region', 'us-east-1')
+        location = get_location_from_region(region)
+        if location is None:
+            print_problem(f"Skipping API Gateway cost for '{component.get('label', 'Unnamed')}' in unmapped region: {region}")
+            return 0
+
         monthly_requests = int(component.get('MonthlyRequests', 0))
         cache_size = float(component.get('CacheSize', 0))
         
         # Get API Gateway request price
-        request_price = get_product_price('AmazonApiGateway', [
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': region},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'API Calls'},
-            {'Type': 'TERM_MATCH', 'Field': 'group', 'Value': 'APIGateway-Requests'},
-            {'Type': 'TERM_MATCH', 'Field': 'requestType', 'Value': 'REST'},
-            {'Type': 'TERM_MATCH', 'Field': 'usagetype', 'Value': 'APS3-APIRequest'},
-            {'Type': 'TERM_MATCH', 'Field': 'operation', 'Value': 'APICall'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicecode', 'Value': 'AmazonApiGateway'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicename', 'Value': 'Amazon API Gateway'}
-        ])
+        request_filters = [
+            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+            *APIGW_REQUEST_BASE_FILTERS
+        ]
         
         # Get API Gateway cache price
-        cache_price = get_product_price('AmazonApiGateway', [
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': region},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'API Gateway Cache'},
-            {'Type': 'TERM_MATCH', 'Field': 'group', 'Value': 'APIGateway-Cache'},
-            {'Type': 'TERM_MATCH', 'Field': 'cacheSize', 'Value': '1.6'},
-            {'Type': 'TERM_MATCH', 'Field': 'usagetype', 'Value': 'APS3-APICache'},
-            {'Type': 'TERM_MATCH', 'Field': 'operation', 'Value': 'Cache'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicecode', 'Value': 'AmazonApiGateway'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicename', 'Value': 'Amazon API Gateway'}
-        ])
+        cache_filters = [
+            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+            *APIGW_CACHE_BASE_FILTERS
+        ]
+        request_price, cache_price = get_product_prices(
+            ('AmazonApiGateway', request_filters),
+            ('AmazonApiGateway', cache_filters)
+        )
         
         request_cost = (monthly_requests / 1000000) * request_price
         cache_cost = cache_size * cache_price
@@ -382,22 +921,28 @@ def estimate_api_gateway_cost(component):
         
         print(f"\n  API Gateway: '{component.get('Name', 'Unnamed')}'")
         print(f"  ├─ Region: {region}")
-        print(f"  ├─ Monthly Requests: {format_number(monthly_requests)}")
-        print(f"  ├─ Cache Size: {format_number(cache_size)}GB")
-        print(f"  ├─ Request Rate: ${format_currency(request_price)}/million requests")
-        print(f"  ├─ Request Cost: ${format_currency(request_cost)}")
-        print(f"  ├─ Cache Rate: ${format_currency(cache_price)}/GB-month")
-        print(f"  ├─ Cache Cost: ${format_currency(cache_cost)}")
-        print(f"  └─ Total Monthly Cost: ${format_currency(total_cost)}")
+        print(f"  ├─ Monthly Requests: {monthly_requests:,}")
+        print(f"  ├─ Cache Size: {cache_size:,}GB")
+        print(f"  ├─ Request Rate: ${request_price:,.2f}/million requests")
+        print(f"  ├─ Request Cost: ${request_cost:,.2f}")
+        print(f"  ├─ Cache Rate: ${cache_price:,.2f}/GB-month")
+        print(f"  ├─ Cache Cost: ${cache_cost:,.2f}")
+        print(f"  └─ Total Monthly Cost: ${total_cost:,.2f}")
         
         return total_cost
     except Exception as e:
-        print(f"Error estimating API Gateway cost: {str(e)}")
+        print_problem(f"Error estimating API Gateway cost: {str(e)}")
         return 0
 
 def estimate_autoscaling_cost(component):
     """Estimate cost for Auto Scaling Group"""
     try:
+        region = component.get('region', DEFAULT_AWS_REGION)
+        location = get_location_from_region(region)
+        if location is None:
+            print_problem(f"Skipping Auto Scaling cost for '{component.get('label', 'Unnamed')}' in unmapped region: {region}")
+            return 0
+
         # Auto Scaling itself is free, but we'll calculate the cost of the instances it manages
         launch_config = component.get('LaunchConfiguration', {})
         instance_type = launch_config.get('InstanceType', 't3.micro')
@@ -408,87 +953,94 @@ def estimate_autoscaling_cost(component):
         # Get EC2 instance pricing
         filters = [
             {'Type': 'TERM_MATCH', 'Field': 'instanceType', 'Value': instance_type},
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': component.get('region', 'Asia Pacific (Mumbai)')},
-            {'Type': 'TERM_MATCH', 'Field': 'operatingSystem', 'Value': 'Linux'},
-            {'Type': 'TERM_MATCH', 'Field': 'tenancy', 'Value': 'Shared'},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'}
+            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+            *ASG_INSTANCE_BASE_FILTERS
         ]
         hourly_rate = get_product_price('AmazonEC2', filters)
         
         # Calculate costs based on desired capacity
-        monthly_hours = 730  # Average hours in a month
-        instance_cost = hourly_rate * monthly_hours
+        instance_cost = hourly_rate * HOURS_PER_MONTH
         
         total_cost = instance_cost * desired_capacity
         
         print(f"\n  Auto Scaling: '{component.get('label', 'Unnamed')}'")
         print(f"  ├─ Instance Type: {instance_type}")
-        print(f"  ├─ Region: {component.get('region', 'Asia Pacific (Mumbai)')}")
+        print(f"  ├─ Region: {region}")
         print(f"  ├─ Min Size: {min_size}")
         print(f"  ├─ Max Size: {max_size}")
         print(f"  ├─ Desired Capacity: {desired_capacity}")
-        print(f"  ├─ Hourly Rate: ${format_currency(hourly_rate)}")
-        print(f"  ├─ Monthly Hours: {format_number(monthly_hours)}")
-        print(f"  ├─ Instance Monthly Cost: ${format_currency(instance_cost)}")
-        print(f"  └─ Total Monthly Cost: ${format_currency(total_cost)}")
+        print(f"  ├─ Hourly Rate: ${hourly_rate:,.2f}")
+        print(f"  ├─ Monthly Hours: {HOURS_PER_MONTH:,}")
+        print(f"  ├─ Instance Monthly Cost: ${instance_cost:,.2f}")
+        print(f"  └─ Total Monthly Cost: ${total_cost:,.2f}")
         
         return total_cost
     except Exception as e:
-        print(f"Error estimating Auto Scaling cost: {str(e)}")
+        print_problem(f"Error estimating Auto Scaling cost: {str(e)}")
         return 0
 
 def estimate_vpc_cost(component):
     """Estimate cost for Amazon VPC"""
     try:
+        region = component.get('region', DEFAULT_AWS_REGION)
+        location = get_location_from_region(region)
+        if location is None:
+            print_problem(f"Skipping VPC cost for '{component.get('label', 'Unnamed')}' in unmapped region: {region}")
+            return 0
+
         # VPC itself is free, but we'll calculate costs for NAT Gateway and VPC Endpoints if specified
         nat_gateway_count = component.get('NatGatewayCount', 0)
         vpc_endpoint_count = component.get('VpcEndpointCount', 0)
         
         # Get NAT Gateway pricing
         nat_filters = [
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': component.get('region', 'Asia Pacific (Mumbai)')},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'NAT Gateway'}
+            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+            *VPC_NAT_GATEWAY_BASE_FILTERS
         ]
-        nat_hourly_rate = get_product_price('AmazonVPC', nat_filters)
         
         # Get VPC Endpoint pricing
         endpoint_filters = [
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': component.get('region', 'Asia Pacific (Mumbai)')},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'VPC Endpoint'}
+            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+            *VPC_ENDPOINT_BASE_FILTERS
         ]
-        endpoint_hourly_rate = get_product_price('AmazonVPC', endpoint_filters)
+        nat_hourly_rate, endpoint_hourly_rate = get_product_prices(
+            ('AmazonVPC', nat_filters),
+            ('AmazonVPC', endpoint_filters)
+        )
         
         # Calculate costs
-        monthly_hours = 730  # Average hours in a month
-        nat_cost = nat_hourly_rate * monthly_hours * nat_gateway_count
-        endpoint_cost = endpoint_hourly_rate * monthly_hours * vpc_endpoint_count
+        nat_cost = nat_hourly_rate * HOURS_PER_MONTH * nat_gateway_count
+        endpoint_cost = endpoint_hourly_rate * HOURS_PER_MONTH * vpc_endpoint_count
         total_cost = nat_cost + endpoint_cost
         
         print(f"\n  VPC: '{component.get('label', 'Unnamed')}'")
-        print(f"  ├─ Region: {component.get('region', 'Asia Pacific (Mumbai)')}")
+        print(f"  ├─ Region: {region}")
         print(f"  ├─ NAT Gateway Count: {nat_gateway_count}")
-        print(f"  ├─ NAT Gateway Rate: ${format_currency(nat_hourly_rate)}/hour")
-        print(f"  ├─ NAT Gateway Cost: ${format_currency(nat_cost)}")
+        print(f"  ├─ NAT Gateway Rate: ${nat_hourly_rate:,.2f}/hour")
+        print(f"  ├─ NAT Gateway Cost: ${nat_cost:,.2f}")
         print(f"  ├─ VPC Endpoint Count: {vpc_endpoint_count}")
-        print(f"  ├─ VPC Endpoint Rate: ${format_currency(endpoint_hourly_rate)}/hour")
-        print(f"  ├─ VPC Endpoint Cost: ${format_currency(endpoint_cost)}")
-        print(f"  └─ Total Monthly Cost: ${format_currency(total_cost)}")
+        print(f"  ├─ VPC Endpoint Rate: ${endpoint_hourly_rate:,.2f}/hour")
+        print(f"  ├─ VPC Endpoint Cost: ${endpoint_cost:,.2f}")
+        print(f"  └─ Total Monthly Cost: ${total_cost:,.2f}")
         
         return total_cost
     except Exception as e:
-        print(f"Error estimating VPC cost: {str(e)}")
+        print_problem(f"Error estimating VPC cost: {str(e)}")
         return 0
 
 def estimate_dynamodb_cost(component):
     """Estimate cost for Amazon DynamoDB"""
     try:
+        region = component.get('region', DEFAULT_AWS_REGION)
+        location = get_location_from_region(region)
+        if location is None:
+            print_problem(f"Skipping DynamoDB cost for '{component.get('label', 'Unnamed')}' in unmapped region: {region}")
+            return 0
+
         # Get DynamoDB pricing
         filters = [
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': component.get('region', 'Asia Pacific (Mumbai)')},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'DynamoDB'}
+            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+            *DYNAMODB_BASE_FILTERS
         ]
         wcu_rate = get_product_price('AmazonDynamoDB', filters)
         
@@ -497,37 +1049,42 @@ def estimate_dynamodb_cost(component):
         rcu = component.get('ReadCapacityUnits', 0)
         storage_gb = component.get('StorageGB', 0)
         
-        wcu_cost = wcu * wcu_rate * 730  # Monthly hours
-        rcu_cost = rcu * (wcu_rate * 0.5) * 730  # Read units are typically half the cost of write units
+        wcu_cost = wcu * wcu_rate * HOURS_PER_MONTH
+        rcu_cost = rcu * (wcu_rate * 0.5) * HOURS_PER_MONTH  # Read units are typically half the cost of write units
         storage_cost = storage_gb * 0.25  # $0.25 per GB-month
         
         total_cost = wcu_cost + rcu_cost + storage_cost
         
         print(f"\n  DynamoDB: '{component.get('label', 'Unnamed')}'")
-        print(f"  ├─ Region: {component.get('region', 'Asia Pacific (Mumbai)')}")
-        print(f"  ├─ Write Capacity Units: {format_number(wcu)}")
-        print(f"  ├─ Read Capacity Units: {format_number(rcu)}")
-        print(f"  ├─ Storage: {format_number(storage_gb)}GB")
-        print(f"  ├─ WCU Rate: ${format_currency(wcu_rate)}/hour")
-        print(f"  ├─ WCU Cost: ${format_currency(wcu_cost)}")
-        print(f"  ├─ RCU Cost: ${format_currency(rcu_cost)}")
-        print(f"  ├─ Storage Cost: ${format_currency(storage_cost)}")
-        print(f"  └─ Total Monthly Cost: ${format_currency(total_cost)}")
+        print(f"  ├─ Region: {region}")
+        print(f"  ├─ Write Capacity Units: {wcu:,}")
+        print(f"  ├─ Read Capacity Units: {rcu:,}")
+        print(f"  ├─ Storage: {storage_gb:,}GB")
+        print(f"  ├─ WCU Rate: ${wcu_rate:,.2f}/hour")
+        print(f"  ├─ WCU Cost: ${wcu_cost:,.2f}")
+        print(f"  ├─ RCU Cost: ${rcu_cost:,.2f}")
+        print(f"  ├─ Storage Cost: ${storage_cost:,.2f}")
+        print(f"  └─ Total Monthly Cost: ${total_cost:,.2f}")
         
         return total_cost
     except Exception as e:
-        print(f"Error estimating DynamoDB cost: {str(e)}")
+        print_problem(f"Error estimating DynamoDB cost: {str(e)}")
         return 0
 
 def estimate_ebs_cost(component):
     """Estimate cost for Amazon EBS"""
     try:
+        region = component.get('region', DEFAULT_AWS_REGION)
+        location = get_location_from_region(region)
+        if location is None:
+            print_problem(f"Skipping EBS cost for '{component.get('label', 'Unnamed')}' in unmapped region: {region}")
+            return 0
+
         # Get EBS pricing
         filters = [
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': component.get('region', 'Asia Pacific (Mumbai)')},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'Storage'},
-            {'Type': 'TERM_MATCH', 'Field': 'volumeType', 'Value': component.get('VolumeType', 'General Purpose')}
+            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+            {'Type': 'TERM_MATCH', 'Field': 'volumeType', 'Value': component.get('VolumeType', 'General Purpose')},
+            *EBS_STORAGE_BASE_FILTERS
         ]
         storage_rate = get_product_price('AmazonEC2', filters)
         
@@ -538,52 +1095,43 @@ def estimate_ebs_cost(component):
         storage_cost = volume_count * volume_size_gb * storage_rate
         
         print(f"\n  EBS: '{component.get('label', 'Unnamed')}'")
-        print(f"  ├─ Region: {component.get('region', 'Asia Pacific (Mumbai)')}")
+        print(f"  ├─ Region: {region}")
         print(f"  ├─ Volume Type: {component.get('VolumeType', 'General Purpose')}")
         print(f"  ├─ Volume Count: {volume_count}")
-        print(f"  ├─ Volume Size: {format_number(volume_size_gb)}GB")
-        print(f"  ├─ Storage Rate: ${format_currency(storage_rate)}/GB-month")
-        print(f"  └─ Total Monthly Cost: ${format_currency(storage_cost)}")
+        print(f"  ├─ Volume Size: {volume_size_gb:,}GB")
+        print(f"  ├─ Storage Rate: ${storage_rate:,.2f}/GB-month")
+        print(f"  └─ Total Monthly Cost: ${storage_cost:,.2f}")
         
         return storage_cost
     except Exception as e:
-        print(f"Error estimating EBS cost: {str(e)}")
+        print_problem(f"Error estimating EBS cost: {str(e)}")
         return 0
 
 def estimate_sns_cost(component):
     """Estimate cost for Amazon SNS"""
     region = component.get('region', 'us-east-1')
+    location = get_location_from_region(region)
+    if location is None:
+        print_problem(f"Skipping SNS cost for '{component.get('name', 'Unnamed')}' in unmapped region: {region}")
+        return 0
+
     topic_count = int(component.get('topic_count', 0))
     monthly_publishes = int(component.get('monthly_publishes', 0))
     
     # Get SNS delivery price
-    delivery_price = get_product_price(
-        service_code='AmazonSNS',
-        filters=[
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': region},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'Message Delivery'},
-            {'Type': 'TERM_MATCH', 'Field': 'usagetype', 'Value': 'APS3-DeliveryAttempts'},
-            {'Type': 'TERM_MATCH', 'Field': 'group', 'Value': 'MessageDelivery'},
-            {'Type': 'TERM_MATCH', 'Field': 'operation', 'Value': 'Delivery'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicecode', 'Value': 'AmazonSNS'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicename', 'Value': 'Amazon Simple Notification Service'}
-        ]
-    )
+    delivery_filters = [
+        {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+        *SNS_DELIVERY_BASE_FILTERS
+    ]
     
     # Get SNS topic price
-    topic_price = get_product_price(
-        service_code='AmazonSNS',
-        filters=[
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': region},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'Topic'},
-            {'Type': 'TERM_MATCH', 'Field': 'usagetype', 'Value': 'APS3-Topic'},
-            {'Type': 'TERM_MATCH', 'Field': 'group', 'Value': 'Topic'},
-            {'Type': 'TERM_MATCH', 'Field': 'operation', 'Value': 'Topic'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicecode', 'Value': 'AmazonSNS'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicename', 'Value': 'Amazon Simple Notification Service'}
-        ]
+    topic_filters = [
+        {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+        *SNS_TOPIC_BASE_FILTERS
+    ]
+    delivery_price, topic_price = get_product_prices(
+        ('AmazonSNS', delivery_filters),
+        ('AmazonSNS', topic_filters)
     )
     
     # Calculate costs
@@ -595,106 +1143,83 @@ def estimate_sns_cost(component):
     print(f"  ├─ Region: {region}")
     print(f"  ├─ Topic Count: {topic_count}")
     print(f"  ├─ Monthly Publishes: {monthly_publishes}")
-    print(f"  ├─ Delivery Rate: ${format_currency(delivery_price)}/million")
-    print(f"  ├─ Delivery Cost: ${format_currency(delivery_cost)}")
-    print(f"  ├─ Topic Rate: ${format_currency(topic_price)}/topic")
-    print(f"  ├─ Topic Cost: ${format_currency(topic_cost)}")
-    print(f"  └─ Total Monthly Cost: ${format_currency(total_cost)}")
+    print(f"  ├─ Delivery Rate: ${delivery_price:,.2f}/million")
+    print(f"  ├─ Delivery Cost: ${delivery_cost:,.2f}")
+    print(f"  ├─ Topic Rate: ${topic_price:,.2f}/topic")
+    print(f"  ├─ Topic Cost: ${topic_cost:,.2f}")
+    print(f"  └─ Total Monthly Cost: ${total_cost:,.2f}")
     
     return total_cost
 
 def estimate_elb_cost(component):
     """Estimate cost for Elastic Load Balancer"""
     region = component.get('region', 'us-east-1')
-    monthly_hours = 730  # Hours in a month
+    location = get_location_from_region(region)
+    if location is None:
+        print_problem(f"Skipping ELB cost for '{component.get('name', 'Unnamed')}' in unmapped region: {region}")
+        return 0
+
     lcu_count = int(component.get('lcu_count', 0))
     
     # Get ELB hourly price
-    hourly_price = get_product_price(
-        service_code='AWSELB',
-        filters=[
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': region},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'Load Balancer'},
-            {'Type': 'TERM_MATCH', 'Field': 'loadBalancerType', 'Value': 'Application'},
-            {'Type': 'TERM_MATCH', 'Field': 'group', 'Value': 'LoadBalancer'},
-            {'Type': 'TERM_MATCH', 'Field': 'usagetype', 'Value': 'APS3-LoadBalancerUsage'},
-            {'Type': 'TERM_MATCH', 'Field': 'operation', 'Value': 'LoadBalancer'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicecode', 'Value': 'AWSELB'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicename', 'Value': 'AWS Elastic Load Balancing'}
-        ]
-    )
+    hourly_filters = [
+        {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+        *ELB_HOURLY_BASE_FILTERS
+    ]
     
     # Get ELB LCU price
-    lcu_price = get_product_price(
-        service_code='AWSELB',
-        filters=[
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': region},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'Load Balancer'},
-            {'Type': 'TERM_MATCH', 'Field': 'loadBalancerType', 'Value': 'Application'},
-            {'Type': 'TERM_MATCH', 'Field': 'group', 'Value': 'LCU'},
-            {'Type': 'TERM_MATCH', 'Field': 'usagetype', 'Value': 'APS3-LCUUsage'},
-            {'Type': 'TERM_MATCH', 'Field': 'operation', 'Value': 'LCU'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicecode', 'Value': 'AWSELB'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicename', 'Value': 'AWS Elastic Load Balancing'}
-        ]
+    lcu_filters = [
+        {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+        *ELB_LCU_BASE_FILTERS
+    ]
+    hourly_price, lcu_price = get_product_prices(
+        ('AWSELB', hourly_filters),
+        ('AWSELB', lcu_filters)
     )
     
     # Calculate costs
-    hourly_cost = monthly_hours * hourly_price if hourly_price else 0
+    hourly_cost = HOURS_PER_MONTH * hourly_price if hourly_price else 0
     lcu_cost = lcu_count * lcu_price if lcu_price else 0
     total_cost = hourly_cost + lcu_cost
     
     print(f"\n  ELB: '{component.get('name', 'Unnamed')}'")
     print(f"  ├─ Region: {region}")
     print(f"  ├─ Load Balancer Type: Application")
-    print(f"  ├─ Monthly Hours: {monthly_hours}")
+    print(f"  ├─ Monthly Hours: {HOURS_PER_MONTH}")
     print(f"  ├─ LCU Count: {lcu_count}")
-    print(f"  ├─ Hourly Rate: ${format_currency(hourly_price)}/hour")
-    print(f"  ├─ Hourly Cost: ${format_currency(hourly_cost)}")
-    print(f"  ├─ LCU Rate: ${format_currency(lcu_price)}/LCU")
-    print(f"  ├─ LCU Cost: ${format_currency(lcu_cost)}")
-    print(f"  └─ Total Monthly Cost: ${format_currency(total_cost)}")
+    print(f"  ├─ Hourly Rate: ${hourly_price:,.2f}/hour")
+    print(f"  ├─ Hourly Cost: ${hourly_cost:,.2f}")
+    print(f"  ├─ LCU Rate: ${lcu_price:,.2f}/LCU")
+    print(f"  ├─ LCU Cost: ${lcu_cost:,.2f}")
+    print(f"  └─ Total Monthly Cost: ${total_cost:,.2f}")
     
     return total_cost
 
 def estimate_efs_cost(component):
     """Estimate cost for Elastic File System"""
     region = component.get('region', 'us-east-1')
+    location = get_location_from_region(region)
+    if location is None:
+        print_problem(f"Skipping EFS cost for '{component.get('name', 'Unnamed')}' in unmapped region: {region}")
+        return 0
+
     storage_size = float(component.get('storage_size', 0))
     monthly_operations = int(component.get('monthly_operations', 0))
     
     # Get EFS storage price
-    storage_price = get_product_price(
-        service_code='AmazonEFS',
-        filters=[
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': region},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'Storage'},
-            {'Type': 'TERM_MATCH', 'Field': 'storageClass', 'Value': 'General Purpose'},
-            {'Type': 'TERM_MATCH', 'Field': 'group', 'Value': 'Storage'},
-            {'Type': 'TERM_MATCH', 'Field': 'usagetype', 'Value': 'APS3-StorageUsage'},
-            {'Type': 'TERM_MATCH', 'Field': 'operation', 'Value': 'Storage'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicecode', 'Value': 'AmazonEFS'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicename', 'Value': 'Amazon Elastic File System'}
-        ]
-    )
+    storage_filters = [
+        {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+        *EFS_STORAGE_BASE_FILTERS
+    ]
     
     # Get EFS IO price
-    io_price = get_product_price(
-        service_code='AmazonEFS',
-        filters=[
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': region},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'Storage'},
-            {'Type': 'TERM_MATCH', 'Field': 'storageClass', 'Value': 'General Purpose'},
-            {'Type': 'TERM_MATCH', 'Field': 'group', 'Value': 'IO'},
-            {'Type': 'TERM_MATCH', 'Field': 'usagetype', 'Value': 'APS3-IOUsage'},
-            {'Type': 'TERM_MATCH', 'Field': 'operation', 'Value': 'IO'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicecode', 'Value': 'AmazonEFS'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicename', 'Value': 'Amazon Elastic File System'}
-        ]
+    io_filters = [
+        {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+        *EFS_IO_BASE_FILTERS
+    ]
+    storage_price, io_price = get_product_prices(
+        ('AmazonEFS', storage_filters),
+        ('AmazonEFS', io_filters)
     )
     
     # Calculate costs
@@ -706,17 +1231,22 @@ def estimate_efs_cost(component):
     print(f"  ├─ Region: {region}")
     print(f"  ├─ Storage Size: {storage_size}GB")
     print(f"  ├─ Monthly Operations: {monthly_operations}")
-    print(f"  ├─ Storage Rate: ${format_currency(storage_price)}/GB-month")
-    print(f"  ├─ Storage Cost: ${format_currency(storage_cost)}")
-    print(f"  ├─ IO Rate: ${format_currency(io_price)}/million operations")
-    print(f"  ├─ IO Cost: ${format_currency(io_cost)}")
-    print(f"  └─ Total Monthly Cost: ${format_currency(total_cost)}")
+    print(f"  ├─ Storage Rate: ${storage_price:,.2f}/GB-month")
+    print(f"  ├─ Storage Cost: ${storage_cost:,.2f}")
+    print(f"  ├─ IO Rate: ${io_price:,.2f}/million operations")
+    print(f"  ├─ IO Cost: ${io_cost:,.2f}")
+    print(f"  └─ Total Monthly Cost: ${total_cost:,.2f}")
     
     return total_cost
 
 def estimate_sqs_cost(component):
     """Estimate cost for Simple Queue Service"""
     region = component.get('region', 'us-east-1')
+    location = get_location_from_region(region)
+    if location is None:
+        print_problem(f"Skipping SQS cost for '{component.get('name', 'Unnamed')}' in unmapped region: {region}")
+        return 0
+
     queue_count = int(component.get('queue_count', 0))
     monthly_requests = int(component.get('monthly_requests', 0))
     
@@ -724,15 +1254,8 @@ def estimate_sqs_cost(component):
     request_price = get_product_price(
         service_code='AmazonSQS',
         filters=[
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': region},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'Message Queue'},
-            {'Type': 'TERM_MATCH', 'Field': 'group', 'Value': 'API-Request'},
-            {'Type': 'TERM_MATCH', 'Field': 'usagetype', 'Value': 'APS3-Request'},
-            {'Type': 'TERM_MATCH', 'Field': 'operation', 'Value': 'Request'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicecode', 'Value': 'AmazonSQS'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicename', 'Value': 'Amazon Simple Queue Service'},
-            {'Type': 'TERM_MATCH', 'Field': 'queueType', 'Value': 'Standard'}
+            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+            *SQS_REQUEST_BASE_FILTERS
         ]
     )
     
@@ -744,29 +1267,27 @@ def estimate_sqs_cost(component):
     print(f"  ├─ Region: {region}")
     print(f"  ├─ Queue Count: {queue_count}")
     print(f"  ├─ Monthly Requests: {monthly_requests}")
-    print(f"  ├─ Request Rate: ${format_currency(request_price)}/million requests")
-    print(f"  └─ Total Monthly Cost: ${format_currency(total_cost)}")
+    print(f"  ├─ Request Rate: ${request_price:,.2f}/million requests")
+    print(f"  └─ Total Monthly Cost: ${total_cost:,.2f}")
     
     return total_cost
 
 def estimate_iam_analyzer_cost(component):
     """Estimate cost for IAM Access Analyzer"""
     region = component.get('region', 'us-east-1')
+    location = get_location_from_region(region)
+    if location is None:
+        print_problem(f"Skipping IAM Access Analyzer cost for '{component.get('name', 'Unnamed')}' in unmapped region: {region}")
+        return 0
+
     analyzer_count = int(component.get('analyzer_count', 0))
     
     # Get analyzer price
     analyzer_price = get_product_price(
         service_code='AWSAccessAnalyzer',
         filters=[
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': region},
-            {'Type': 'TERM_MATCH', 'Field': 'termType', 'Value': 'OnDemand'},
-            {'Type': 'TERM_MATCH', 'Field': 'productFamily', 'Value': 'IAM Access Analyzer'},
-            {'Type': 'TERM_MATCH', 'Field': 'group', 'Value': 'Analyzer'},
-            {'Type': 'TERM_MATCH', 'Field': 'usagetype', 'Value': 'APS3-AnalyzerUsage'},
-            {'Type': 'TERM_MATCH', 'Field': 'operation', 'Value': 'Analyzer'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicecode', 'Value': 'AWSAccessAnalyzer'},
-            {'Type': 'TERM_MATCH', 'Field': 'servicename', 'Value': 'AWS IAM Access Analyzer'},
-            {'Type': 'TERM_MATCH', 'Field': 'analyzerType', 'Value': 'Standard'}
+            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+            *IAM_ANALYZER_BASE_FILTERS
         ]
     )
     
@@ -776,8 +1297,8 @@ def estimate_iam_analyzer_cost(component):
     print(f"\n  IAM Access Analyzer: '{component.get('name', 'Unnamed')}'")
     print(f"  ├─ Region: {region}")
     print(f"  ├─ Analyzer Count: {analyzer_count}")
-    print(f"  ├─ Rate per Analyzer: ${format_currency(analyzer_price)}/month")
-    print(f"  └─ Total Monthly Cost: ${format_currency(total_cost)}")
+    print(f"  ├─ Rate per Analyzer: ${analyzer_price:,.2f}/month")
+    print(f"  └─ Total Monthly Cost: ${total_cost:,.2f}")
     
     return total_cost
 
@@ -800,18 +1321,58 @@ COMPONENT_HANDLERS = {
     "AWSIAMAccessAnalyzer": estimate_iam_analyzer_cost
 }
 
-def estimate_cost_from_json(architecture_json_path):
-    """Estimates the monthly cost based on an architecture defined in a JSON file (nodes format)."""
-    total_cost = 0.0
+class ThreadRoutedStdout:
+    """Stand-in for sys.stdout that sends worker-thread writes to that thread's node buffer."""
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        buffer = getattr(thread_output, 'buffer', None)
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+class ProblemsOnlyOutput:
+    """Node buffer for runs that hide the breakdown: ordinary writes are dropped, print_problem lines kept."""
+    def __init__(self):
+        self.problems = io.StringIO()
+
+    def write(self, text):
+        return len(text)
+
+    def getvalue(self):
+        return self.problems.getvalue()
+
+def run_handler(handler, node, keep_output=True):
+    """Run a node handler on a worker thread, returning (cost, printed output, error)."""
+    thread_output.buffer = io.StringIO() if keep_output else ProblemsOnlyOutput()
+    try:
+        return handler(node), thread_output.buffer.getvalue(), None
+    except Exception as e:
+        return 0.0, thread_output.buffer.getvalue(), e
+    finally:
+        thread_output.buffer = None
+
+def estimate_cost_from_json(architecture_json_path, verbose=True):
+    """Estimates the monthly cost based on an architecture defined in a JSON file (nodes format).
+
+    With verbose=False the per-component breakdowns are not written; skip and error
+    messages and the totals still are.
+    """
+    component_costs = []
     cost_breakdown = {}
 
+    # Import boto3 and do the TLS handshake while the architecture is read and grouped
+    lookup_executor.submit(warm_pricing_client)
+
     try:
-        with open(architecture_json_path, 'r') as f:
-            architecture_data = json.load(f)
+        with open(architecture_json_path, 'rb') as f:
+            architecture_data = orjson.loads(f.read())
     except FileNotFoundError:
         print(f"Error: Architecture file not found at {architecture_json_path}")
         return 0.0, {}
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         print(f"Error: Could not decode JSON from {architecture_json_path}: {e}")
         return 0.0, {}
         
@@ -824,49 +1385,70 @@ def estimate_cost_from_json(architecture_json_path):
         
     nodes = architecture_data['nodes'] # Iterate over nodes
 
+    prefetch_ec2_catalogs(nodes)
+    prefetch_rds_catalogs(nodes)
+
     print("Calculating costs for components (nodes):")
-    for i, node in enumerate(nodes):
-        component_type = node.get('type') # Get type from node
-        component_name = node.get('label', node.get('id', f"Node {i+1} ({component_type})"))
-        
-        if not component_type:
-            print(f"Skipping node {i+1} due to missing 'type'.")
-            continue
+    # Price every node concurrently, then report them in their original order
+    original_stdout = sys.stdout
+    sys.stdout = ThreadRoutedStdout(original_stdout)
+    try:
+        with ThreadPoolExecutor(max_workers=PRICING_WORKERS) as executor:
+            jobs = []
+            for i, node in enumerate(nodes):
+                component_type = node.get('type') # Get type from node
+                component_name = node.get('label', node.get('id', f"Node {i+1} ({component_type})"))
+                
+                if not component_type:
+                    jobs.append((f"Skipping node {i+1} due to missing 'type'.", None, None, None))
+                elif component_type in COMPONENT_HANDLERS:
+                    future = executor.submit(run_handler, COMPONENT_HANDLERS[component_type], node, verbose) # Pass the whole node
+                    jobs.append((None, component_name, component_type, future))
+                else:
+                    jobs.append((f"  - Skipping node type '{component_type}' (no handler defined). ", None, None, None))
 
-        if component_type in COMPONENT_HANDLERS:
-            handler = COMPONENT_HANDLERS[component_type]
-            try:
-                component_cost = handler(node) # Pass the whole node
-                if component_cost > 0:
+            for message, component_name, component_type, future in jobs:
+                if future is None:
+                    print(message)
+                    continue
+                component_cost, output, error = future.result()
+                # The node's whole breakdown goes out in a single write
+                original_stdout.write(output)
+                if error is not None:
+                    print(f"Error estimating cost for {component_name} ({component_type}): {error}")
+                elif component_cost > 0:
                     cost_breakdown[component_name] = component_cost
-                    total_cost += component_cost
-            except Exception as e:
-                # Add traceback for debugging
-                import traceback
-                print(f"Error estimating cost for {component_name} ({component_type}): {e}")
-                # traceback.print_exc()
-        else:
-            print(f"  - Skipping node type '{component_type}' (no handler defined). ")
+                    component_costs.append(component_cost)
+    finally:
+        sys.stdout = original_stdout
+    save_price_cache()
+
+    # One exactly-rounded sum over every component instead of a running float total
+    total_cost = math.fsum(component_costs)
             
     print("-----------------------------------------")
     
-    print(f"\nEstimated Total Monthly Cost: {format_currency(total_cost)}")
+    print(f"\nEstimated Total Monthly Cost: ${total_cost:,.2f}")
     print("\nCost Breakdown:")
     if cost_breakdown:
         for item, cost in cost_breakdown.items():
-            print(f"- {item}: {format_currency(cost)}")
+            print(f"- {item}: ${cost:,.2f}")
     else:
         print("(No costs calculated or all components skipped)")
         
     return total_cost, cost_breakdown
 
 if __name__ == "__main__":
-    # Example Usage: Replace with the actual path to your generated JSON
-    # architecture_file = "path/to/your/architecture.json" 
-    architecture_file = "templet_arch.json" # Using the template for now as an example
-    # architecture_file = "demo_arch.json" # Use the demo file for testing
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Estimate the monthly AWS cost of an architecture JSON")
+    # Using the template as an example when no file is given
+    parser.add_argument("architecture_file", nargs="?", default="templet_arch.json", help="Architecture JSON (nodes format)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only show problems and the totals, not each component's breakdown")
+    args = parser.parse_args()
+    architecture_file = args.architecture_file
     
     if os.path.exists(architecture_file):
-        estimate_cost_from_json(architecture_file)
+        estimate_cost_from_json(architecture_file, verbose=not args.quiet)
     else:
         print(f"Example architecture file '{architecture_file}' not found. Please provide a valid path.") 
\ No newline at end of file
@@ -1,15 +1,21 @@
 import json
-import boto3
+import orjson
 import requests
 import datetime
 import logging
+import math
 from typing import Dict, Any, List, Optional, Union
 from dotenv import load_dotenv
+from utils import create_pricing_client
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # Load environment variables from .env file
 load_dotenv()
 
+HOURS_PER_MONTH = 730  # Average hours in a month
+PRICING_WORKERS = 16  # Nodes priced concurrently; lookups are I/O-bound
+
 class AWScostEstimator:
     """AWS Cost Estimation tool that takes an architecture JSON and provides pricing estimates."""
     
@@ -20,49 +26,19 @@ class AWScostEstimator:
         # Configure AWS credentials from environment variables
         aws_access_key_id = os.getenv('AWS_ACCESS_KEY_ID')
         aws_secret_access_key = os.getenv('AWS_SECRET_ACCESS_KEY')
-        aws_region = os.getenv('AWS_REGION', region)
         
         if not aws_access_key_id or not aws_secret_access_key:
             raise ValueError("AWS credentials not found in environment variables. Please check your .env file.")
         
-        # Initialize AWS clients with credentials
-        self.pricing_client = boto3.client(
-            'pricing',
-            region_name='us-east-1',  # Pricing API only available in us-east-1
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key
-        )
-        self.ec2_client = boto3.client(
-            'ec2',
-            region_name=aws_region,
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key
-        )
-        self.rds_client = boto3.client(
-            'rds',
-            region_name=aws_region,
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key
-        )
-        self.dynamodb_client = boto3.client(
-            'dynamodb',
-            region_name=aws_region,
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key
-        )
-        self.s3_client = boto3.client(
-            's3',
-            region_name=aws_region,
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key
-        )
+        # Only the Pricing API is queried; the client is shared across estimator instances
+        self.pricing_client = create_pricing_client(aws_access_key_id, aws_secret_access_key)
         
         # Default values for services if not specified in the JSON
         self.defaults = {
             "AmazonEC2": {
                 "InstanceType": "t3.medium",
                 "TimeForHosting": "24/7",
-                "HoursPerMonth": 730  # Average hours in a month
+                "HoursPerMonth": HOURS_PER_MONTH
             },
             "AmazonRDS": {
                 "DBEngine": "mysql",
@@ -133,13 +109,8 @@ class AWScostEstimator:
         Returns:
             Dictionary containing pricing information
         """
-        filter_parts = []
-        for f in filters:
-            field = f.get('Field', '')
-            value = f.get('Value', '')
-            filter_parts.append(f"{field}={value}")
-        
-        cache_key = f"{service_code}:{','.join(filter_parts)}"
+        # Order-insensitive key so the same filters built in a different order still hit the cache
+        cache_key = (service_code, tuple(sorted((f.get('Field', ''), f.get('Value', '')) for f in filters)))
         if cache_key in self.price_cache:
             return self.price_cache[cache_key]
         
@@ -161,7 +132,7 @@ class AWScostEstimator:
             
             if len(response.get('PriceList', [])) > 0:
                 result['success'] = True
-                result['raw_response'] = [json.loads(item) for item in response['PriceList']]
+                result['raw_response'] = [orjson.loads(item) for item in response['PriceList']]
                 
                 # Extract pricing information from the response
                 for price_item in result['raw_response']:
@@ -214,7 +185,6 @@ class AWScostEstimator:
         Returns:
             Updated architecture JSON with cost estimations
         """
-        total_hourly_cost = 0.0
         service_costs = {}
         
         # Helper function to convert value to float safely
@@ -257,11 +227,9 @@ class AWScostEstimator:
                 self.logger.warning(f"Converting non-numeric value '{value}' to {default}")
                 return default
         
-        # Process each node in the architecture
-        for node in architecture_json.get("nodes", []):
+        # Price a single node and return its hourly cost; runs on a pool thread
+        def price_node(node):
             node_type = node.get("type", "")
-            node_id = node.get("id", "")
-            node_label = node.get("label", node_id)
             hourly_cost = 0.0
             
             # Initialize cost breakdown if not present
@@ -341,10 +309,10 @@ class AWScostEstimator:
                             storage_price_per_gb = detail['price']
                             break
                     
-                    storage_hourly_cost = (storage * storage_price_per_gb) / 730
+                    storage_hourly_cost = (storage * storage_price_per_gb) / HOURS_PER_MONTH
                     self.logger.info(f"Found RDS storage pricing: ${storage_price_per_gb}/GB-month")
                 else:
-                    storage_hourly_cost = (storage * 0.115) / 730  # Default
+                    storage_hourly_cost = (storage * 0.115) / HOURS_PER_MONTH  # Default
                     self.logger.warning(f"Using default RDS storage pricing: $0.115/GB-month")
                 
                 backup_hourly_cost = storage_hourly_cost * 0.1  # 10% of storage cost
@@ -389,7 +357,7 @@ class AWScostEstimator:
                         price_per_gb = 0.021
                     self.logger.warning(f"Using fallback S3 pricing: ${price_per_gb}/GB-month")
                 
-                hourly_cost = (price_per_gb * size) / 730
+                hourly_cost = (price_per_gb * size) / HOURS_PER_MONTH
                 
                 node["CostBreakdown"]["StorageSize"] = f"{size} GB"
                 node["CostBreakdown"]["CostPerGB"] = f"${price_per_gb}/GB-month"
@@ -428,7 +396,7 @@ class AWScostEstimator:
                 monthly_request_cost = (invocations / 1000000) * request_price
                 monthly_compute_cost = invocations * execution_time_per_request * gb * compute_price
                 
-                hourly_cost = (monthly_request_cost + monthly_compute_cost) / 730
+                hourly_cost = (monthly_request_cost + monthly_compute_cost) / HOURS_PER_MONTH
                 
                 node["CostBreakdown"]["InvocationCost"] = f"${request_price} per million requests"
                 node["CostBreakdown"]["ExecutionTimeCost"] = f"${compute_price} per GB-second" 
@@ -469,15 +437,11 @@ class AWScostEstimator:
                 else:
                     self.logger.warning("Using default DynamoDB pricing")
                 
-                # Calculate DynamoDB cost
-                monthly_rcu_cost = read_capacity_units * rcu_price * 730
-                monthly_wcu_cost = write_capacity_units * wcu_price * 730
-                monthly_storage_cost = storage * storage_price
-                
-                hourly_cost = (monthly_rcu_cost + monthly_wcu_cost + monthly_storage_cost) / 730
-                
+                # Calculate DynamoDB cost; capacity is already priced per hour, only storage is monthly
                 throughput_hourly = (read_capacity_units * rcu_price + write_capacity_units * wcu_price)
-                storage_hourly = (storage * storage_price / 730)
+                storage_hourly = (storage * storage_price / HOURS_PER_MONTH)
+                
+                hourly_cost = throughput_hourly + storage_hourly
                 
                 node["CostBreakdown"]["ProvisionedThroughputCost"] = f"${throughput_hourly:.4f}/hour"
                 node["CostBreakdown"]["StorageCost"] = f"${storage_hourly:.4f}/hour"
@@ -526,7 +490,7 @@ class AWScostEstimator:
                     }.get(volume_type.lower(), 0.08)
                     self.logger.warning(f"Using fallback EBS {volume_type} pricing: ${price_per_gb}/GB-month")
                 
-                hourly_cost = (price_per_gb * volume_size * volume_count) / 730
+                hourly_cost = (price_per_gb * volume_size * volume_count) / HOURS_PER_MONTH
                 
                 node["CostBreakdown"]["VolumeType"] = volume_type
                 node["CostBreakdown"]["VolumeSize"] = f"{volume_size} GB"
@@ -559,7 +523,7 @@ class AWScostEstimator:
                     price_per_million = 3.50  # Default
                     self.logger.warning(f"Using default API Gateway pricing: ${price_per_million}/million requests")
                 
-                hourly_cost = (requests_per_month / 1000000) * price_per_million / 730
+                hourly_cost = (requests_per_month / 1000000) * price_per_million / HOURS_PER_MONTH
                 
                 node["RequestsPerMonth"] = requests_per_month
                 node["CostBreakdown"]["CostPerRequest"] = f"${price_per_million} per million requests"
@@ -593,7 +557,7 @@ class AWScostEstimator:
                     price_per_million = 0.50  # Default
                     self.logger.warning(f"Using default SNS pricing: ${price_per_million}/million requests")
                 
-                hourly_cost = (requests_per_month / 1000000) * price_per_million / 730
+                hourly_cost = (requests_per_month / 1000000) * price_per_million / HOURS_PER_MONTH
                 
                 node["TopicCount"] = topic_count
                 node["RequestsPerMonth"] = requests_per_month
@@ -667,7 +631,7 @@ class AWScostEstimator:
                     price_per_gb = 0.30  # Default
                     self.logger.warning(f"Using default EFS pricing: ${price_per_gb}/GB-month")
                 
-                hourly_cost = (size * price_per_gb) / 730
+                hourly_cost = (size * price_per_gb) / HOURS_PER_MONTH
                 
                 node["Size"] = size
                 node["CostBreakdown"]["StorageSizeCost"] = f"${hourly_cost:.4f}/hour"
@@ -701,7 +665,7 @@ class AWScostEstimator:
                     price_per_million = 0.40  # Default
                     self.logger.warning(f"Using default SQS pricing: ${price_per_million}/million requests")
                 
-                hourly_cost = (requests_per_month / 1000000) * price_per_million / 730
+                hourly_cost = (requests_per_month / 1000000) * price_per_million / HOURS_PER_MONTH
                 
                 node["QueueCount"] = queue_count
                 node["RequestsPerMonth"] = requests_per_month
@@ -712,17 +676,26 @@ class AWScostEstimator:
                 analyzer_count = safe_float(node.get("AnalyzerCount") or self.defaults["AWSIAMAccessAnalyzer"]["AnalyzerCount"])
                 
                 # IAM Access Analyzer pricing is generally $1.00 per analyzer per month
-                hourly_cost = (analyzer_count * 1.00) / 730
+                hourly_cost = (analyzer_count * 1.00) / HOURS_PER_MONTH
                 
                 node["AnalyzerCount"] = analyzer_count
                 node["CostBreakdown"]["AnalyzerCost"] = f"${hourly_cost:.4f}/hour"
                 node["HourlyCost"] = f"${hourly_cost:.4f}"
             
-            # Add the node's hourly cost to service costs
+            return hourly_cost
+        
+        # Process every node concurrently so their Pricing API round trips overlap
+        nodes = architecture_json.get("nodes", [])
+        with ThreadPoolExecutor(max_workers=PRICING_WORKERS) as executor:
+            node_hourly_costs = list(executor.map(price_node, nodes))
+        
+        # Add each node's hourly cost to service costs, in node order
+        for node, hourly_cost in zip(nodes, node_hourly_costs):
+            node_label = node.get("label", node.get("id", ""))
             service_costs[node_label] = f"${hourly_cost:.4f}/hour"
-            
-            # Add the node's hourly cost to the total
-            total_hourly_cost += hourly_cost
+        
+        # One exactly-rounded sum over every node instead of a running float total
+        total_hourly_cost = math.fsum(node_hourly_costs)
                 
         # Add total cost to the architecture JSON - only hourly cost as requested
         architecture_json["TotalCost"] = {
@@ -743,8 +716,8 @@ class AWScostEstimator:
             List of updated architecture JSONs with cost estimations
         """
         try:
-            with open(file_path, 'r') as f:
-                json_data = json.load(f)
+            with open(file_path, 'rb') as f:
+                json_data = orjson.loads(f.read())
                 
             # Check if the JSON is a list of architectures or a single architecture
             if isinstance(json_data, list):
@@ -821,10 +794,7 @@ def main():
             # Interactive mode with better error handling
             try:
                 print("Enter your architecture JSON (paste and press Ctrl+D on Unix/Linux or Ctrl+Z followed by Enter on Windows):")
-                json_text = ""
-                for line in sys.stdin:
-                    json_text += line
-                architecture_json = json.loads(json_text)
+                architecture_json = orjson.loads(sys.stdin.buffer.read())
                 updated_architectures = estimator.estimate_from_json(architecture_json)
                 if not isinstance(updated_architectures, list):
                     updated_architectures = [updated_architectures]
@@ -845,7 +815,7 @@ def main():
             
             # Extract total hourly cost as a float
             total_hourly_cost = float(architecture['TotalCost']['HourlyCost'].replace('$', ''))
-            total_monthly_cost = total_hourly_cost * 730  # 730 hours in a month
+            total_monthly_cost = total_hourly_cost * HOURS_PER_MONTH
             
             # Print service costs and total in a clean, precise format
             print("\nService Costs:")
@@ -860,7 +830,7 @@ def main():
             for service, cost in architecture['TotalCost']['ServiceBreakdown'].items():
                 hourly_cost = float(cost.replace('$', '').replace('/hour', ''))
                 if hourly_cost > 0.0001:  # Skip negligible costs
-                    monthly_cost = hourly_cost * 730
+                    monthly_cost = hourly_cost * HOURS_PER_MONTH
                     yearly_cost = monthly_cost * 12
                     print(f"{service.ljust(30)} ${hourly_cost:>9.4f} ${monthly_cost:>14.2f} ${yearly_cost:>14.2f}")
             
@@ -1,15 +1,18 @@
 #!/usr/bin/env python3
 import json
-import boto3
+import orjson
 import os
 import argparse
 from dotenv import load_dotenv
+from utils import create_pricing_client
 import logging
 from typing import Dict, Any, List
 
 # Load environment variables from .env file
 load_dotenv()
 
+HOURS_PER_MONTH = 730  # Average hours in a month
+
 class AWSCostFetcher:
     """Fetch actual AWS costs based on a JSON architecture definition"""
     
@@ -23,27 +26,8 @@ class AWSCostFetcher:
         if not aws_access_key_id or not aws_secret_access_key:
             raise ValueError("AWS credentials not found. Please set AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY in your .env file.")
         
-        # Initialize boto3 clients
-        self.pricing_client = boto3.client(
-            'pricing', 
-            region_name='us-east-1',  # Pricing API is only available in us-east-1
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key
-        )
-        
-        self.ec2_client = boto3.client(
-            'ec2',
-            region_name=aws_region,
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key
-        )
-        
-        self.rds_client = boto3.client(
-            'rds',
-            region_name=aws_region,
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key
-        )
+        # Only the Pricing API is queried; the client is shared across fetcher instances
+        self.pricing_client = create_pricing_client(aws_access_key_id, aws_secret_access_key)
         
         self.region = aws_region
         self.price_cache = {}
@@ -88,7 +72,7 @@ class AWSCostFetcher:
             
             if len(response.get('PriceList', [])) > 0:
                 for price_str in response['PriceList']:
-                    price = json.loads(price_str)
+                    price = orjson.loads(price_str)
                     
                     # Skip Savings Plans and Reserved Instances
                     on_demand_terms = price.get('terms', {}).get('OnDemand', {})
@@ -154,7 +138,7 @@ class AWSCostFetcher:
             
             if len(response.get('PriceList', [])) > 0:
                 for price_str in response['PriceList']:
-                    price = json.loads(price_str)
+                    price = orjson.loads(price_str)
                     
                     product_attributes = price.get('product', {}).get('attributes', {})
                     if engine.lower() not in product_attributes.get('databaseEngine', '').lower():
@@ -221,7 +205,7 @@ class AWSCostFetcher:
                 
                 if len(response.get('PriceList', [])) > 0:
                     for price_str in response['PriceList']:
-                        price = json.loads(price_str)
+                        price = orjson.loads(price_str)
                         product_attributes = price.get('product', {}).get('attributes', {})
                         
                         # Look for Standard storage pricing
@@ -284,7 +268,7 @@ class AWSCostFetcher:
                     # Look for tier 2 pricing (next 450 TB)
                     if len(tier2_response.get('PriceList', [])) > 0:
                         for price_str in tier2_response['PriceList']:
-                            price = json.loads(price_str)
+                            price = orjson.loads(price_str)
                             for term_key, term in price.get('terms', {}).get('OnDemand', {}).items():
                                 for dimension_key, dimension in term.get('priceDimensions', {}).items():
                                     desc = dimension.get('description', '').lower()
@@ -326,7 +310,7 @@ class AWSCostFetcher:
                         # Look for tier 3 pricing (over 500 TB)
                         if len(tier3_response.get('PriceList', [])) > 0:
                             for price_str in tier3_response['PriceList']:
-                                price = json.loads(price_str)
+                                price = orjson.loads(price_str)
                                 for term_key, term in price.get('terms', {}).get('OnDemand', {}).items():
                                     for dimension_key, dimension in term.get('priceDimensions', {}).items():
                                         desc = dimension.get('description', '').lower()
@@ -349,7 +333,7 @@ class AWSCostFetcher:
         # We're omitting it here since it's minor compared to storage costs
         
         # Convert to hourly cost
-        hourly_cost = storage_cost / 730  # 730 hours in a month
+        hourly_cost = storage_cost / HOURS_PER_MONTH
         
         return hourly_cost
     
@@ -374,7 +358,7 @@ class AWSCostFetcher:
                 
                 if len(response.get('PriceList', [])) > 0:
                     for price_str in response['PriceList']:
-                        price = json.loads(price_str)
+                        price = orjson.loads(price_str)
                         product_attributes = price.get('product', {}).get('attributes', {})
                         
                         for term_key, term in price.get('terms', {}).get('OnDemand', {}).items():
@@ -414,7 +398,7 @@ class AWSCostFetcher:
         # Calculate hourly cost
         capacity_cost = (read_capacity_units * pricing['rcu_price'] + 
                          write_capacity_units * pricing['wcu_price'])
-        storage_cost = (storage_gb * pricing['storage_price']) / 730
+        storage_cost = (storage_gb * pricing['storage_price']) / HOURS_PER_MONTH
         
         return capacity_cost + storage_cost
     
@@ -438,7 +422,7 @@ class AWSCostFetcher:
                 
                 if len(response.get('PriceList', [])) > 0:
                     for price_str in response['PriceList']:
-                        price = json.loads(price_str)
+                        price = orjson.loads(price_str)
                         
                         for term_key, term in price.get('terms', {}).get('OnDemand', {}).items():
                             for dimension_key, dimension in term.get('priceDimensions', {}).items():
@@ -475,7 +459,7 @@ class AWSCostFetcher:
         monthly_compute_cost = invocations * duration_seconds * gb * pricing['compute_price']
         
         # Convert to hourly cost
-        hourly_cost = (monthly_request_cost + monthly_compute_cost) / 730
+        hourly_cost = (monthly_request_cost + monthly_compute_cost) / HOURS_PER_MONTH
         
         return hourly_cost
     
@@ -502,7 +486,7 @@ class AWSCostFetcher:
                 
                 if len(response.get('PriceList', [])) > 0:
                     for price_str in response['PriceList']:
-                        price = json.loads(price_str)
+                        price = orjson.loads(price_str)
                         product_attributes = price.get('product', {}).get('attributes', {})
                         
                         for term_key, term in price.get('terms', {}).get('OnDemand', {}).items():
@@ -553,7 +537,7 @@ class AWSCostFetcher:
             throughput_cost = (throughput - 125) * pricing['throughput_price']
         
         # Convert to hourly cost
-        hourly_cost = (storage_cost + iops_cost + throughput_cost) / 730
+        hourly_cost = (storage_cost + iops_cost + throughput_cost) / HOURS_PER_MONTH
         
         return hourly_cost
     
@@ -581,7 +565,7 @@ class AWSCostFetcher:
             
             if len(response.get('PriceList', [])) > 0:
                 for price_str in response['PriceList']:
-                    price = json.loads(price_str)
+                    price = orjson.loads(price_str)
                     product_attributes = price.get('product', {}).get('attributes', {})
                     
                     # Check for load balancer type in attributes
@@ -797,7 +781,7 @@ class AWSCostFetcher:
             total_hourly_cost += hourly_cost
         
         # Calculate monthly and yearly costs
-        monthly_cost = total_hourly_cost * 730  # 730 hours in a month
+        monthly_cost = total_hourly_cost * HOURS_PER_MONTH
         yearly_cost = monthly_cost * 12
         
         # Add total cost to the architecture JSON
@@ -833,8 +817,8 @@ def main():
     
     try:
         # Load input JSON
-        with open(args.file, 'r') as f:
-            architecture = json.load(f)
+        with open(args.file, 'rb') as f:
+            architecture = orjson.loads(f.read())
         
         # Initialize cost fetcher
         cost_fetcher = AWSCostFetcher()
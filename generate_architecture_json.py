@@ -1,12 +1,13 @@
 import os
 import json
-import re
+import orjson
 from openai import OpenAI
 import google.generativeai as genai
 from mistralai import Mistral
 from dotenv import load_dotenv
 from colorama import init, Fore, Style
-from datetime import datetime
+import time
+from utils import extract_json, make_safe_title
 
 # Initialize colorama
 init()
@@ -74,7 +75,7 @@ elif is_valid_api_key(MISTRAL_API_KEY):
 def generate_with_openai(prompt, system_message):
     """Generate response using OpenAI API"""
     response = openai_client.chat.completions.create(
-        model="gpt-3.5-turbo",
+        model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": system_message},
             {"role": "user", "content": prompt}
@@ -142,15 +143,14 @@ def get_ai_response(prompt, system_message):
 def save_architecture_json(project_title, architecture_json):
     """Save architecture JSON to a file"""
     # Create a safe project title for folder name
-    safe_title = "".join(c for c in project_title if c.isalnum() or c in (' ', '-', '_')).strip()
+    safe_title = make_safe_title(project_title)
     
     # Create project folder if it doesn't exist
     project_folder = os.path.join(os.getcwd(), safe_title)
-    if not os.path.exists(project_folder):
-        os.makedirs(project_folder)
+    os.makedirs(project_folder, exist_ok=True)
     
     # Create filename with timestamp
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    timestamp = time.strftime('%Y%m%d_%H%M%S')
     filename = f"{safe_title}_Architecture_{timestamp}.json"
     
     # Save file in the project folder
@@ -166,7 +166,7 @@ def generate_architecture_json(architecture_prompt, template_json):
 {architecture_prompt}
 
 Considering these requirements, please generate an AWS architecture in JSON format, structured similarly to this example:
-{json.dumps(template_json, indent=2)}
+{orjson.dumps(template_json, option=orjson.OPT_INDENT_2).decode()}
 
 Ensure the architecture is optimized for low latency, high availability, and cost efficiency."""
 
@@ -177,9 +177,9 @@ Focus on creating a well-optimized, secure, and scalable architecture."""
     try:
         response = get_ai_response(context, system_message)
         # Extract JSON from response
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
+        json_blob = extract_json(response)
+        if json_blob:
+            return orjson.loads(json_blob)
         return None
     except Exception as e:
         print_error(f"Error generating architecture JSON: {str(e)}")
@@ -1,19 +1,25 @@
 import os
+import asyncio
 import json
-import re
+import functools
+import orjson
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
 import gradio as gr
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI
 import google.generativeai as genai
 from mistralai import Mistral
 from dotenv import load_dotenv
-from datetime import datetime
 import time
 from main import (
     get_project_details, get_next_question, get_user_response,
     generate_architecture_prompt, generate_security_assessment,
-    save_file, save_analysis_results, determine_question_count,
+    save_file, save_analysis_results, determine_question_count, QUESTION_CONTEXT_PAIRS,
     print_colored, print_header, print_info, print_error, print_success
 )
+from utils import extract_json, make_safe_title
 from generate_architecture_json import (
     generate_architecture_json, save_architecture_json
 )
@@ -26,17 +32,96 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 
+# Keepalive connection pool shared by the OpenAI and Mistral async clients. Its timeout
+# applies to their calls too, so reads keep the SDKs' 600 s allowance: non-streaming
+# completions send nothing until the whole response is ready
+http_client = httpx.AsyncClient(
+    timeout=httpx.Timeout(30.0, read=600.0),
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=40)
+)
+
 # Initialize API clients
 openai_client = None
 gemini_model = None
 mistral_client = None
-active_api = None
-
-# Global variables for conversation state
-conversation_history = []
-questions = []
-answers = []
-current_project = None
+active_api = None  # Default provider; each session's choice comes from its model dropdown
+
+@dataclass
+class Session:
+    """Conversation state for one browser session, kept in gr.State"""
+    project: dict | None = None
+    questions: list = field(default_factory=list)
+    answers: list = field(default_factory=list)
+    history: list = field(default_factory=list)
+    text: str = ""  # Displayed transcript, extended as lines are added
+    queue: deque = field(default_factory=deque)  # Pre-generated questions waiting to be asked
+    qa_text: str = ""  # Q/A block for the prompts, extended as answers arrive
+
+    def add_line(self, line):
+        """Record a conversation line and extend the displayed transcript"""
+        self.text = f"{self.text}\n{line}" if self.history else line
+        self.history.append(line)
+
+    def add_answer(self, answer):
+        """Record the answer to the latest question and extend the Q/A block"""
+        self.answers.append(answer)
+        pair = f"Q: {self.questions[len(self.answers) - 1]}\nA: {answer}\n"
+        self.qa_text = f"{self.qa_text}\n{pair}" if self.qa_text else pair
+
+    def set_answers(self, answers):
+        """Replace all answers and rebuild the Q/A block"""
+        self.answers = list(answers)
+        self.qa_text = "\n".join(f"Q: {q}\nA: {a}\n" for q, a in zip(self.questions, self.answers))
+
+DEFAULT_TEMPLATE = "templet_arch.json"
+
+# OpenAI models: the cheaper one serves the many interview question turns
+OPENAI_MODEL = "gpt-4o-2024-11-20"
+OPENAI_QUESTION_MODEL = "gpt-4o-mini"
+
+# Recent AI responses keyed by (prompt, system message, provider, OpenAI model)
+RESPONSE_CACHE_SIZE = 256
+response_cache = OrderedDict()
+
+# Providers are skipped for a while after this many consecutive failures
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 60  # seconds
+
+@dataclass
+class Breaker:
+    """Circuit breaker tracking consecutive failures of one AI provider"""
+    fails: int = 0
+    opened_at: float = 0
+    state: str = "CLOSED"
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def allow(self):
+        """Whether a call may be made, letting one probe through after the cooldown"""
+        with self.lock:
+            if self.state == "CLOSED":
+                return True
+            if time.time() - self.opened_at < BREAKER_COOLDOWN:
+                return False
+            self.state = "HALF_OPEN"
+            self.opened_at = time.time()
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.fails = 0
+            self.state = "CLOSED"
+
+    def record_failure(self):
+        with self.lock:
+            self.fails += 1
+            if self.state == "HALF_OPEN" or self.fails >= BREAKER_THRESHOLD:
+                self.state = "OPEN"
+                self.opened_at = time.time()
+
+breakers = {"openai": Breaker(), "gemini": Breaker(), "mistral": Breaker()}
+
+# Order in which other providers are tried when the selected one fails
+PROVIDER_PRIORITY = ("openai", "mistral", "gemini")
 
 def initialize_api_clients():
     """Initialize API clients based on available keys"""
@@ -48,7 +133,9 @@ def initialize_api_clients():
     # Try OpenAI
     if is_valid_api_key(OPENAI_API_KEY):
         try:
-            openai_client = OpenAI(api_key=OPENAI_API_KEY)
+            # Clients are built once and reused across retries, keeping their pooled connections
+            if openai_client is None:
+                openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client)
             available_models.append("openai")
             status_messages.append("✅ OpenAI API initialized successfully")
         except Exception as e:
@@ -59,8 +146,10 @@ def initialize_api_clients():
     # Try Gemini
     if is_valid_api_key(GEMINI_API_KEY):
         try:
-            genai.configure(api_key=GEMINI_API_KEY)
-            gemini_model = genai.GenerativeModel('models/gemini-2.0-pro-exp')
+            # The key is fixed for the process, so configure and build the model only once
+            if gemini_model is None:
+                genai.configure(api_key=GEMINI_API_KEY)
+                gemini_model = genai.GenerativeModel('models/gemini-2.0-pro-exp')
             available_models.append("gemini")
             status_messages.append("✅ Gemini API initialized successfully")
         except Exception as e:
@@ -71,7 +160,8 @@ def initialize_api_clients():
     # Try Mistral
     if is_valid_api_key(MISTRAL_API_KEY):
         try:
-            mistral_client = Mistral(api_key=MISTRAL_API_KEY)
+            if mistral_client is None:
+                mistral_client = Mistral(api_key=MISTRAL_API_KEY, async_client=http_client)
             available_models.append("mistral")
             status_messages.append("✅ Mistral API initialized successfully")
         except Exception as e:
@@ -80,8 +170,9 @@ def initialize_api_clients():
         status_messages.append("❌ Mistral API: No valid API key found")
     
     if available_models:
-        global active_api
-        active_api = available_models[0]  # Set first available model as default
+        # Only pick a default once, so a page load never changes another session's provider
+        if active_api not in available_models:
+            active_api = available_models[0]
         return "\n".join(status_messages), available_models
     
     return "\n".join([
@@ -102,70 +193,206 @@ def is_valid_api_key(api_key):
         return False
     return True
 
-def get_ai_response(prompt, system_message):
-    """Get response from the active AI model with fallback mechanisms"""
-    global active_api
+async def get_ai_response(prompt, system_message, openai_model=OPENAI_MODEL, api=None):
+    """Get response from the selected AI model, reusing identical earlier requests"""
+    api = api or active_api
+    cache_key = (prompt, system_message, api, openai_model)
+    if cache_key in response_cache:
+        response_cache.move_to_end(cache_key)
+        return response_cache[cache_key]
     
-    def try_api_call():
+    answered_by, response = await request_ai_response(prompt, system_message, openai_model, api)
+    # File fallback answers under the provider that gave them, not the selected one
+    cache_ai_response((prompt, system_message, answered_by, openai_model), response)
+    return response
+
+def cache_ai_response(cache_key, response):
+    """Remember a response, evicting the least recently used one when full"""
+    response_cache[cache_key] = response
+    if len(response_cache) > RESPONSE_CACHE_SIZE:
+        response_cache.popitem(last=False)
+
+async def get_ai_response_stream(prompt, system_message, openai_model=OPENAI_MODEL, api=None):
+    """Yield the selected AI model's response as it is generated"""
+    api = api or active_api
+    cache_key = (prompt, system_message, api, openai_model)
+    if cache_key in response_cache:
+        response_cache.move_to_end(cache_key)
+        yield response_cache[cache_key]
+        return
+    
+    chunks = []
+    stream_error = None
+    breaker = breakers.get(api)
+    if breaker is None or breaker.allow():
         try:
-            if active_api == "openai" and openai_client:
-                response = openai_client.chat.completions.create(
-                    model="gpt-4o-2024-11-20",
-                    messages=[
-                        {"role": "system", "content": system_message},
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                return response.choices[0].message.content, None
-            elif active_api == "gemini" and gemini_model:
-                full_prompt = f"{system_message}\n\n{prompt}"
-                response = gemini_model.generate_content(full_prompt)
-                return response.text, None
-            elif active_api == "mistral" and mistral_client:
-                messages = [
+            async for text in stream_api_call(prompt, system_message, openai_model, api):
+                chunks.append(text)
+                yield text
+        except Exception as e:
+            if breaker:
+                breaker.record_failure()
+            # Only fall back while nothing has been shown yet
+            if chunks:
+                raise
+            stream_error = str(e)
+        else:
+            if breaker and chunks:
+                breaker.record_success()
+    
+    if not chunks:
+        # A failed stream is not retried: the fallback starts at the next provider
+        answered_by, response = await request_ai_response(prompt, system_message, openai_model, api, stream_error)
+        cache_ai_response((prompt, system_message, answered_by, openai_model), response)
+        yield response
+        return
+    cache_ai_response(cache_key, "".join(chunks))
+
+async def stream_api_call(prompt, system_message, openai_model, api):
+    """Stream text chunks from the given AI model"""
+    if api == "openai" and openai_client:
+        response = await openai_client.chat.completions.create(
+            model=openai_model,
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ],
+            stream=True
+        )
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    elif api == "gemini" and gemini_model:
+        full_prompt = f"{system_message}\n\n{prompt}"
+        response = await gemini_model.generate_content_async(full_prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+    elif api == "mistral" and mistral_client:
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt}
+        ]
+        response = await mistral_client.chat.stream_async(
+            model="mistral-large-latest",
+            messages=messages
+        )
+        async for chunk in response:
+            if chunk.data.choices and chunk.data.choices[0].delta.content:
+                yield chunk.data.choices[0].delta.content
+
+def fallback_order(selected, skip_selected=False):
+    """Yield the selected provider first, unless skipped, then the others by priority"""
+    if not skip_selected:
+        yield selected
+    for api in PROVIDER_PRIORITY:
+        if api != selected:
+            yield api
+
+async def request_ai_response(prompt, system_message, openai_model, selected, failed_error=None):
+    """Get (provider, response) from the selected AI model with fallback mechanisms
+
+    failed_error is the error of a call to the selected model that already failed,
+    in which case only the other providers are tried.
+    """
+    async def call_api(api):
+        if api == "openai" and openai_client:
+            response = await openai_client.chat.completions.create(
+                model=openai_model,
+                messages=[
                     {"role": "system", "content": system_message},
                     {"role": "user", "content": prompt}
                 ]
-                response = mistral_client.chat.complete(
-                    model="mistral-large-latest",
-                    messages=messages
-                )
-                return response.choices[0].message.content, None
-            return None, "No valid API clients available"
+            )
+            return response.choices[0].message.content
+        elif api == "gemini" and gemini_model:
+            full_prompt = f"{system_message}\n\n{prompt}"
+            response = await gemini_model.generate_content_async(full_prompt)
+            return response.text
+        elif api == "mistral" and mistral_client:
+            messages = [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ]
+            response = await mistral_client.chat.complete_async(
+                model="mistral-large-latest",
+                messages=messages
+            )
+            return response.choices[0].message.content
+        return None
+
+    async def try_api_call(api):
+        breaker = breakers.get(api)
+        if breaker and not breaker.allow():
+            return None, f"{api} skipped after repeated failures"
+        try:
+            response = await call_api(api)
         except Exception as e:
+            if breaker:
+                breaker.record_failure()
             return None, str(e)
+        if response is None:
+            return None, "No valid API clients available"
+        if breaker:
+            breaker.record_success()
+        return response, None
+
+    # Try the selected API first, then fall back without changing the selection
+    errors = [failed_error] if failed_error else []
+    for api in fallback_order(selected, skip_selected=bool(failed_error)):
+        response, error = await try_api_call(api)
+        if response:
+            return api, response
+        errors.append(error if not errors else f"Tried {api}: {error}")
 
-    # Try current API first
-    response, error = try_api_call()
-    if response:
-        return response
+    # If all APIs fail, raise exception with all errors
+    raise Exception(f"All API calls failed: {chr(10).join(errors)}")
 
-    # If current API fails, try other available APIs
-    original_api = active_api
-    apis_to_try = ["openai", "mistral", "gemini"]
-    
-    for api in apis_to_try:
-        if api != original_api:
-            active_api = api
-            response, new_error = try_api_call()
-            if response:
-                return response
-            error = f"{error}\nTried {api}: {new_error}"
+def next_question_prompt(project_details, previous_questions, previous_answers):
+    """Build the prompt and system message for the next question"""
+    recent_pairs = list(zip(previous_questions, previous_answers))[-QUESTION_CONTEXT_PAIRS:]
+    # Static instructions first and the changing Q/A log last, so turns share a cacheable prefix
+    context = f"""Generate the next most relevant question to ask about the project's technical requirements for AWS cloud architecture.
+The question should be natural and conversational, as if you're a real architecture engineer having a discussion.
+Focus on gathering information about:
+1. Expected user base and traffic
+2. Data storage requirements
+3. Security and compliance needs
+4. Performance requirements
+5. Budget constraints
+6. Scalability needs
+7. Integration requirements
+8. Disaster recovery needs
+9. Monitoring and maintenance preferences
+10. Technical stack preferences
 
-    # If all APIs fail, raise exception with all errors
-    raise Exception(f"All API calls failed: {error}")
+Generate only ONE question, and make it sound natural and conversational.
 
-def get_next_question(project_details, previous_questions, previous_answers):
-    """Generate the next relevant question based on previous context"""
-    context = f"""Project Title: {project_details['title']}
+Project Title: {project_details['title']}
 Description: {project_details['description']}
 
 Previous Questions and Answers:
-{chr(10).join(f"Q: {q}\nA: {a}\n" for q, a in zip(previous_questions, previous_answers))}
+{chr(10).join(f"Q: {q}\nA: {a}\n" for q, a in recent_pairs)}"""
 
-Generate the next most relevant question to ask about the project's technical requirements for AWS cloud architecture.
-The question should be natural and conversational, as if you're a real architecture engineer having a discussion.
-Focus on gathering information about:
+    system_message = """You are an experienced cloud architecture engineer having a natural conversation with a client.
+Your goal is to gather technical requirements by asking one question at a time in a conversational manner.
+Make your questions sound natural and friendly, as if you're having a real discussion."""
+
+    return context, system_message
+
+async def get_next_question(project_details, previous_questions, previous_answers, api=None):
+    """Generate the next relevant question based on previous context"""
+    prompt = next_question_prompt(project_details, previous_questions, previous_answers)
+    return await get_ai_response(*prompt, OPENAI_QUESTION_MODEL, api)
+
+async def pregenerate_questions(project_details, count, api=None):
+    """Generate all questions for the conversation in a single request"""
+    context = f"""Project Title: {project_details['title']}
+Description: {project_details['description']}
+
+Generate {count} distinct questions to ask about the project's technical requirements for AWS cloud architecture.
+Each question should be natural and conversational, as if you're a real architecture engineer having a discussion.
+Cover these topics in a sensible order:
 1. Expected user base and traffic
 2. Data storage requirements
 3. Security and compliance needs
@@ -177,21 +404,35 @@ Focus on gathering information about:
 9. Monitoring and maintenance preferences
 10. Technical stack preferences
 
-Generate only ONE question, and make it sound natural and conversational."""
+Return only a JSON array of {count} strings, one question per string."""
 
     system_message = """You are an experienced cloud architecture engineer having a natural conversation with a client.
 Your goal is to gather technical requirements by asking one question at a time in a conversational manner.
 Make your questions sound natural and friendly, as if you're having a real discussion."""
 
-    return get_ai_response(context, system_message)
-
-def generate_architecture_prompt(project_details, questions, answers):
+    response = await get_ai_response(context, system_message, OPENAI_QUESTION_MODEL, api)
+    start, end = response.find('['), response.rfind(']')
+    if start == -1 or end < start:
+        return []
+    try:
+        generated = orjson.loads(response[start:end + 1])
+    except ValueError:
+        return []
+    return [q.strip() for q in generated if isinstance(q, str) and q.strip()]
+
+async def pop_next_question(session, api=None):
+    """Take the next pre-generated question, or generate one if the queue is empty"""
+    if session.queue:
+        return session.queue.popleft()
+    return await get_next_question(session.project, session.questions, session.answers, api)
+
+async def generate_architecture_prompt(project_details, qa_text, api=None):
     """Generate the final architecture prompt based on all gathered information"""
     context = f"""Project Title: {project_details['title']}
 Description: {project_details['description']}
 
 Full Requirements Discussion:
-{chr(10).join(f"Q: {q}\nA: {a}\n" for q, a in zip(questions, answers))}
+{qa_text}
 
 Generate a comprehensive AWS architecture prompt in a narrative format with single line breaks between paragraphs.
 The prompt should follow this structure but be written in a natural, conversational way:
@@ -207,9 +448,9 @@ The prompt should follow this structure but be written in a natural, conversatio
     system_message = """You are a cloud architecture expert creating detailed AWS infrastructure requirements.
 Write the prompt in a natural, flowing style that captures all the technical requirements while maintaining readability."""
 
-    return get_ai_response(context, system_message)
+    return await get_ai_response(context, system_message, api=api)
 
-def generate_security_assessment(architecture_prompt):
+async def generate_security_assessment(architecture_prompt, api=None):
     """Generate security assessment for the proposed architecture"""
     context = f"""Based on the following AWS architecture, provide a detailed security assessment:
 {architecture_prompt}
@@ -231,21 +472,21 @@ Generate a JSON response with the following structure:
 Focus on AWS security best practices and compliance requirements."""
 
     try:
-        response = get_ai_response(context, system_message)
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
+        response = await get_ai_response(context, system_message, api=api)
+        json_blob = extract_json(response)
+        if json_blob:
+            return orjson.loads(json_blob)
         return None
     except Exception as e:
         raise Exception(f"Error generating security assessment: {str(e)}")
 
-def generate_architecture_json_from_prompt(architecture_prompt, template_json):
+async def generate_architecture_json_from_prompt(architecture_prompt, template_text, api=None):
     """Generate architecture JSON based on prompt and template"""
     context = f"""Based on the following AWS architecture requirements:
 {architecture_prompt}
 
 Considering these requirements, please generate an AWS architecture in JSON format, structured similarly to this example:
-{json.dumps(template_json, indent=2)}
+{template_text}
 
 Ensure the architecture is optimized for low latency, high availability, and cost efficiency."""
 
@@ -254,23 +495,22 @@ Include all necessary AWS services, their configurations, and interconnections.
 Focus on creating a well-optimized, secure, and scalable architecture."""
 
     try:
-        response = get_ai_response(context, system_message)
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
+        response = await get_ai_response(context, system_message, api=api)
+        json_blob = extract_json(response)
+        if json_blob:
+            return orjson.loads(json_blob)
         return None
     except Exception as e:
         raise Exception(f"Error generating architecture JSON: {str(e)}")
 
 def save_file(project_title, content, file_type):
     """Save content to a file with project title and timestamp"""
-    safe_title = "".join(c for c in project_title if c.isalnum() or c in (' ', '-', '_')).strip()
+    safe_title = make_safe_title(project_title)
     project_folder = os.path.join(os.getcwd(), safe_title)
     
-    if not os.path.exists(project_folder):
-        os.makedirs(project_folder)
+    os.makedirs(project_folder, exist_ok=True)
     
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    timestamp = time.strftime('%Y%m%d_%H%M%S')
     filename = f"{safe_title}_{file_type}_{timestamp}.txt"
     file_path = os.path.join(project_folder, filename)
     
@@ -279,147 +519,126 @@ def save_file(project_title, content, file_type):
     
     return file_path
 
-def determine_question_count(project_details):
-    """Determine the number of questions based on project complexity"""
-    description = project_details['description'].lower()
-    complexity_score = 0
-    
-    tech_indicators = [
-        'microservices', 'distributed', 'real-time', 'machine learning', 'ai', 'iot',
-        'big data', 'analytics', 'streaming', 'container', 'kubernetes', 'serverless',
-        'multi-region', 'global', 'enterprise', 'mission-critical', 'high availability',
-        'disaster recovery', 'compliance', 'security', 'encryption', 'authentication',
-        'authorization', 'api', 'integration', 'database', 'cache', 'queue', 'message',
-        'event-driven', 'batch processing', 'data warehouse', 'data lake'
-    ]
-    
-    for indicator in tech_indicators:
-        if indicator in description:
-            complexity_score += 1
-    
-    if complexity_score <= 5:
-        return 10
-    elif complexity_score <= 10:
-        return 15
-    elif complexity_score <= 15:
-        return 20
-    elif complexity_score <= 20:
-        return 25
-    else:
-        return 30
+async def save_file_async(project_title, content, file_type):
+    """Save a file on a worker thread so the event loop is not blocked"""
+    return await asyncio.to_thread(save_file, project_title, content, file_type)
 
-def start_conversation(project_title, project_description):
+async def start_conversation(project_title, project_description, session, api=None):
     """Start a new conversation"""
-    global conversation_history, questions, answers, current_project
-    
-    conversation_history = []
-    questions = []
-    answers = []
-    current_project = {
+    session = Session(project={
         "title": project_title,
         "description": project_description
-    }
+    })
     
-    total_questions = determine_question_count(current_project)
+    total_questions = determine_question_count(session.project)
     
-    next_question = get_next_question(current_project, questions, answers)
+    # Generate the whole question list up front so each turn is answered locally
+    session.queue.extend(await pregenerate_questions(session.project, total_questions, api))
+    next_question = await pop_next_question(session, api)
     if next_question:
-        conversation_history.append(f"Assistant: {next_question}")
-        questions.append(next_question)
-        return "\n\n".join(conversation_history), next_question, f"Question 1/{total_questions}"
-    return "Failed to start conversation", "", f"Question 0/{total_questions}"
-
-def continue_conversation(user_response):
-    """Continue the conversation with user's response"""
-    global conversation_history, questions, answers
-    
-    if not current_project:
-        return "No active conversation. Please start a new conversation.", ""
+        session.add_line(f"Assistant: {next_question}")
+        session.questions.append(next_question)
+        return session.text, next_question, f"Question 1/{total_questions}", session
+    return "Failed to start conversation", "", f"Question 0/{total_questions}", session
+
+async def continue_conversation(user_response, session, api=None):
+    """Continue the conversation with user's response, streaming new questions"""
+    if not session.project:
+        yield "No active conversation. Please start a new conversation.", "", session
+        return
     
     # Add user response
-    conversation_history.append(f"User: {user_response}")
-    answers.append(user_response)
+    session.add_line(f"User: {user_response}")
+    session.add_answer(user_response)
     
     # Add blank line after user response
-    conversation_history.append("")
+    session.add_line("")
     
-    # Get and add next question
-    next_question = get_next_question(current_project, questions, answers)
+    # Get and add next question, showing it as it is generated if none is queued
+    if session.queue:
+        next_question = session.queue.popleft()
+    else:
+        next_question = ""
+        prompt = next_question_prompt(session.project, session.questions, session.answers)
+        async for text in get_ai_response_stream(*prompt, OPENAI_QUESTION_MODEL, api):
+            next_question += text
+            yield f"{session.text}\nAssistant: {next_question}", next_question, session
     if next_question:
-        conversation_history.append(f"Assistant: {next_question}")
-        questions.append(next_question)
-        return "\n".join(conversation_history), next_question
-    return "\n".join(conversation_history), ""
+        session.add_line(f"Assistant: {next_question}")
+        session.questions.append(next_question)
+        yield session.text, next_question, session
+        return
+    yield session.text, "", session
 
-def finish_conversation():
+async def finish_conversation(session, api=None):
     """Finish the conversation and generate architecture"""
-    global conversation_history, questions, answers, current_project
-    
-    if not current_project:
-        return "No active conversation. Please start a new conversation.", ""
+    if not session.project:
+        return "No active conversation. Please start a new conversation.", "", session
     
     try:
-        architecture_prompt = generate_architecture_prompt(current_project, questions, answers)
+        architecture_prompt = await generate_architecture_prompt(session.project, session.qa_text, api)
         if not architecture_prompt:
-            return "Failed to generate architecture prompt", ""
+            return "Failed to generate architecture prompt", "", session
         
-        security_assessment = generate_security_assessment(architecture_prompt)
+        security_assessment = await generate_security_assessment(architecture_prompt, api)
         
         # Format conversation with proper spacing
         formatted_conversation = []
-        for i, line in enumerate(conversation_history):
+        for i, line in enumerate(session.history):
             formatted_conversation.append(line)
-            if i < len(conversation_history) - 1 and line.startswith("User:"):
+            if i < len(session.history) - 1 and line.startswith("User:"):
                 formatted_conversation.append("")  # Add blank line after user responses
         
-        conversation_text = "\n".join(formatted_conversation)
-        save_file(current_project["title"], conversation_text, "Communication")
-        save_file(current_project["title"], architecture_prompt, "Architecture")
-        
+        transcript = "\n".join(formatted_conversation)
+        saves = [
+            save_file_async(session.project["title"], transcript, "Communication"),
+            save_file_async(session.project["title"], architecture_prompt, "Architecture")
+        ]
         if security_assessment:
-            save_file(current_project["title"], json.dumps(security_assessment, indent=2), "Security")
-        
-        conversation_history = []
-        questions = []
-        answers = []
-        current_project = None
+            saves.append(save_file_async(session.project["title"], orjson.dumps(security_assessment, option=orjson.OPT_INDENT_2).decode(), "Security"))
+        await asyncio.gather(*saves)
         
-        return "Architecture generated successfully!", architecture_prompt
+        return "Architecture generated successfully!", architecture_prompt, Session()
         
     except Exception as e:
-        return f"An error occurred: {str(e)}", ""
+        return f"An error occurred: {str(e)}", "", session
+
+@functools.lru_cache(maxsize=8)
+def load_template(template_path, mtime):
+    """Load a template JSON rendered for the prompt; mtime keys out edited files"""
+    with open(template_path, 'rb') as f:
+        return orjson.dumps(orjson.loads(f.read()), option=orjson.OPT_INDENT_2).decode()
 
-def generate_architecture_json(architecture_prompt, project_title, template_file=None):
+async def generate_architecture_json(architecture_prompt, project_title, template_file=None, api=None):
     """Generate architecture JSON from prompt"""
     try:
-        template_path = template_file if template_file else "templet_arch.json"
+        template_path = template_file if template_file else DEFAULT_TEMPLATE
         
         try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                template_json = json.load(f)
+            template_text = load_template(template_path, os.path.getmtime(template_path))
         except FileNotFoundError:
             return f"Template file not found: {template_path}", ""
         except json.JSONDecodeError:
             return "Invalid JSON template file", ""
         
-        architecture_json = generate_architecture_json_from_prompt(architecture_prompt, template_json)
+        architecture_json = await generate_architecture_json_from_prompt(architecture_prompt, template_text, api)
         
         if architecture_json:
-            json_file = save_file(project_title, json.dumps(architecture_json, indent=4), "Architecture")
-            return f"Architecture JSON saved to: {json_file}", json.dumps(architecture_json, indent=2)
+            json_file = await save_file_async(project_title, json.dumps(architecture_json, indent=4), "Architecture")
+            return f"Architecture JSON saved to: {json_file}", orjson.dumps(architecture_json, option=orjson.OPT_INDENT_2).decode()
         else:
             return "Failed to generate architecture JSON", ""
             
     except Exception as e:
         return f"An error occurred: {str(e)}", ""
 
-def analyze_requirements(project_details, questions, answers):
-    """Analyze and display understanding of project requirements"""
+def requirements_prompt(project_details, qa_text):
+    """Build the prompt and system message for the requirements analysis"""
     context = f"""Project Title: {project_details['title']}
 Description: {project_details['description']}
 
 Full Requirements Discussion:
-{chr(10).join(f"Q: {q}\nA: {a}\n" for q, a in zip(questions, answers))}
+{qa_text}
 
 Based on the provided information, analyze and summarize your understanding of the project requirements.
 Focus on:
@@ -439,7 +658,18 @@ Present your understanding in a clear, structured format."""
     system_message = """You are an experienced cloud architecture engineer analyzing project requirements.
 Provide a clear, structured summary of your understanding of the project needs and constraints."""
 
-    return get_ai_response(context, system_message)
+    return context, system_message
+
+async def analyze_requirements(project_details, qa_text, api=None):
+    """Analyze and display understanding of project requirements"""
+    return await get_ai_response(*requirements_prompt(project_details, qa_text), api=api)
+
+async def stream_requirements(project_details, qa_text, api=None):
+    """Yield the requirements analysis as it grows"""
+    understanding = ""
+    async for text in get_ai_response_stream(*requirements_prompt(project_details, qa_text), api=api):
+        understanding += text
+        yield understanding
 
 def modify_answers(questions, answers):
     """Allow user to modify specific answers"""
@@ -447,10 +677,8 @@ def modify_answers(questions, answers):
     return modified_answers
 
 def switch_model(model_name):
-    """Switch the active AI model"""
-    global active_api
+    """Report the AI model selected in this session's dropdown"""
     if model_name in ["openai", "gemini", "mistral"]:
-        active_api = model_name
         model_names = {
             "openai": "OpenAI ChatGPT",
             "gemini": "Google Gemini",
@@ -508,7 +736,7 @@ def create_ui():
             
             return (
                 status,  # API status
-                gr.Dropdown(choices=model_choices, value=models[0] if models else None, visible=bool(models)),  # Updated dropdown
+                gr.Dropdown(choices=model_choices, value=models[0] if models else None, visible=bool(models)),  # Per-session selection
                 models,  # Available models list
                 f"Using {model_choices[0][0]}" if model_choices else ""  # Initial model status
             )
@@ -535,6 +763,9 @@ def create_ui():
         # Store total questions as a state variable
         total_questions = gr.State(value=10)
         
+        # Conversation state, allocated per browser session
+        session_state = gr.State(Session())
+        
         with gr.Tab("Architecture Design"):
             with gr.Row():
                 with gr.Column(scale=1):
@@ -616,61 +847,55 @@ def create_ui():
                         show_copy_button=True
                     )
             
-            def update_counter():
-                if current_project:
-                    total = determine_question_count(current_project)
-                    return f"Question {len(questions)}/{total}"
+            def update_counter(session):
+                if session.project:
+                    total = determine_question_count(session.project)
+                    return f"Question {len(session.questions)}/{total}"
                 return "Question 0/10"
             
-            def analyze_and_show_requirements():
-                if not current_project or not questions or not answers:
-                    return "Please complete the conversation first.", ""
-                understanding = analyze_requirements(current_project, questions, answers)
-                return understanding, ""
+            async def analyze_and_show_requirements(session, api):
+                if not session.project or not session.questions or not session.answers:
+                    yield "Please complete the conversation first.", ""
+                    return
+                async for understanding in stream_requirements(session.project, session.qa_text, api):
+                    yield understanding, ""
             
-            def handle_confirmation(understanding):
+            async def handle_confirmation(understanding, api):
                 if understanding == "Please complete the conversation first.":
                     return understanding, "", "Please complete the conversation first.", ""
                 
                 # Generate security assessment
                 try:
-                    sec_assessment = generate_security_assessment(understanding)
-                    sec_assessment_text = json.dumps(sec_assessment, indent=2) if sec_assessment else "Security assessment failed."
+                    sec_assessment = await generate_security_assessment(understanding, api)
+                    sec_assessment_text = orjson.dumps(sec_assessment, option=orjson.OPT_INDENT_2).decode() if sec_assessment else "Security assessment failed."
                 except Exception as e:
                     sec_assessment_text = f"Error generating security assessment: {str(e)}"
                 
                 return understanding, sec_assessment_text, "Understanding confirmed. You can now generate the architecture.", ""
             
-            def handle_modification():
-                global answers, current_project, questions
-                if not current_project or not questions or not answers:
-                    return "Please complete the conversation first.", ""
-                answers = modify_answers(questions, answers)
-                return analyze_requirements(current_project, questions, answers), ""
+            async def handle_modification(session, api):
+                if not session.project or not session.questions or not session.answers:
+                    return "Please complete the conversation first.", "", session
+                session.set_answers(modify_answers(session.questions, session.answers))
+                return await analyze_requirements(session.project, session.qa_text, api), "", session
             
             def handle_restart():
-                global conversation_history, questions, answers, current_project
-                conversation_history = []
-                questions = []
-                answers = []
-                current_project = None
-                return "", "", "", "", "", ""
+                return "", "", "", "", "", "", "", Session()
             
-            def save_all_results(architecture_prompt, security_assessment):
-                if not current_project:
+            async def save_all_results(architecture_prompt, security_assessment, session):
+                if not session.project:
                     return "No active project. Please start a new conversation."
                 
                 try:
-                    # Save conversation
-                    conversation_text = "\n".join(conversation_history)
-                    save_file(current_project["title"], conversation_text, "Conversation")
-                    
-                    # Save architecture
-                    save_file(current_project["title"], architecture_prompt, "Architecture")
-                    
-                    # Save security assessment
+                    # Save conversation and architecture, plus the security assessment if any
+                    conversation_text = "\n".join(session.history)
+                    saves = [
+                        save_file_async(session.project["title"], conversation_text, "Conversation"),
+                        save_file_async(session.project["title"], architecture_prompt, "Architecture")
+                    ]
                     if security_assessment:
-                        save_file(current_project["title"], security_assessment, "SecurityAssessment")
+                        saves.append(save_file_async(session.project["title"], security_assessment, "SecurityAssessment"))
+                    await asyncio.gather(*saves)
                     
                     return "All files saved successfully!"
                 except Exception as e:
@@ -678,17 +903,17 @@ def create_ui():
             
             start_btn.click(
                 fn=start_conversation,
-                inputs=[project_title, project_description],
-                outputs=[conversation_history, current_question, question_counter]
+                inputs=[project_title, project_description, session_state, model_dropdown],
+                outputs=[conversation_history, current_question, question_counter, session_state]
             )
             
             continue_btn.click(
                 fn=continue_conversation,
-                inputs=[user_response],
-                outputs=[conversation_history, current_question]
+                inputs=[user_response, session_state, model_dropdown],
+                outputs=[conversation_history, current_question, session_state]
             ).then(
                 fn=update_counter,
-                inputs=None,
+                inputs=[session_state],
                 outputs=question_counter
             ).then(
                 fn=lambda x: "",
@@ -698,30 +923,30 @@ def create_ui():
             
             finish_btn.click(
                 fn=analyze_and_show_requirements,
-                inputs=[],
+                inputs=[session_state, model_dropdown],
                 outputs=[requirements_understanding, security_assessment]
             )
             
             confirm_btn.click(
                 fn=handle_confirmation,
-                inputs=[requirements_understanding],
+                inputs=[requirements_understanding, model_dropdown],
                 outputs=[requirements_understanding, security_assessment, status, architecture_output]
             ).then(
                 fn=save_all_results,
-                inputs=[architecture_output, security_assessment],
+                inputs=[architecture_output, security_assessment, session_state],
                 outputs=[status]
             )
             
             modify_btn.click(
                 fn=handle_modification,
-                inputs=[],
-                outputs=[requirements_understanding, security_assessment]
+                inputs=[session_state, model_dropdown],
+                outputs=[requirements_understanding, security_assessment, session_state]
             )
             
             restart_btn.click(
                 fn=handle_restart,
                 inputs=[],
-                outputs=[conversation_history, current_question, question_counter, requirements_understanding, security_assessment, status, architecture_output]
+                outputs=[conversation_history, current_question, question_counter, requirements_understanding, security_assessment, status, architecture_output, session_state]
             )
         
         with gr.Tab("Architecture JSON"):
@@ -761,18 +986,21 @@ def create_ui():
                     return None
                 return template_file.name
             
-            def save_json_result(json_output, project_title):
+            async def save_json_result(json_output, project_title):
                 if not json_output:
                     return "No JSON to save."
                 try:
-                    file_path = save_file(project_title, json_output, "ArchitectureJSON")
+                    file_path = await save_file_async(project_title, json_output, "ArchitectureJSON")
                     return f"JSON saved to: {file_path}"
                 except Exception as e:
                     return f"Error saving JSON: {str(e)}"
             
+            async def generate_json(prompt, title, template, api):
+                return await generate_architecture_json(prompt, title, process_template(template), api)
+            
             generate_json_btn.click(
-                fn=lambda p, t, f: generate_architecture_json(p, t, process_template(f)),
-                inputs=[architecture_prompt, json_project_title, template_file],
+                fn=generate_json,
+                inputs=[architecture_prompt, json_project_title, template_file, model_dropdown],
                 outputs=[json_status, json_output]
             ).then(
                 fn=save_json_result,
@@ -784,4 +1012,6 @@ def create_ui():
 
 if __name__ == "__main__":
     demo = create_ui()
-    demo.launch(share=True)  # Enable sharing for external access 
\ No newline at end of file
+    # Queue requests so the async handlers can serve several sessions at once;
+    # set GRADIO_SHARE=1 to open a public share link
+    demo.queue(default_concurrency_limit=8, max_size=64).launch(share=os.getenv("GRADIO_SHARE") == "1")
\ No newline at end of file
@@ -4,13 +4,12 @@ import google.generativeai as genai  # Importing the Google Generative AI client
 from mistralai import Mistral  # Updated Mistral import
 from dotenv import load_dotenv  # Importing the dotenv module to load environment variables from a .env file
 from colorama import init, Fore, Style
-from datetime import datetime
 import time
 
 # Add new imports
-import json
-import re
+import orjson
 from typing import Dict, List, Optional, Union
+from utils import extract_json, make_safe_title
 
 # Initialize colorama
 init()
@@ -86,15 +85,14 @@ elif is_valid_api_key(MISTRAL_API_KEY):
 def save_file(project_title, content, file_type):
     """Save content to a file with project title and timestamp"""
     # Create a safe folder name from the project title (remove special characters)
-    safe_title = "".join(c for c in project_title if c.isalnum() or c in (' ', '-', '_')).strip()
+    safe_title = make_safe_title(project_title)
     
     # Create project folder if it doesn't exist
     project_folder = safe_title
-    if not os.path.exists(project_folder):
-        os.makedirs(project_folder)
+    os.makedirs(project_folder, exist_ok=True)
     
     # Create filename with timestamp
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    timestamp = time.strftime('%Y%m%d_%H%M%S')
     filename = f"{safe_title}_{file_type}_{timestamp}.txt"
     
     # Full path including project folder
@@ -108,7 +106,7 @@ def save_file(project_title, content, file_type):
 def generate_with_openai(prompt, system_message):
     """Generate response using OpenAI API"""
     response = openai_client.chat.completions.create(
-        model="gpt-4o-2024-11-20",
+        model=OPENAI_MODEL,
         messages=[
             {"role": "system", "content": system_message},
             {"role": "user", "content": prompt}
@@ -166,15 +164,18 @@ def get_project_details():
         "description": project_description
     }, conversation
 
-def get_next_question(project_details, previous_questions, previous_answers):
-    """Generate the next relevant question based on previous context"""
-    context = f"""Project Title: {project_details['title']}
-Description: {project_details['description']}
+# OpenAI models: the cheaper one serves the many interview question turns
+OPENAI_MODEL = "gpt-4o-2024-11-20"
+OPENAI_QUESTION_MODEL = "gpt-4o-mini"
 
-Previous Questions and Answers:
-{chr(10).join(f"Q: {q}\nA: {a}\n" for q, a in zip(previous_questions, previous_answers))}
+# Only the most recent Q/A pairs are sent when asking for the next question
+QUESTION_CONTEXT_PAIRS = 6
 
-Generate the next most relevant question to ask about the project's technical requirements for AWS cloud architecture.
+def get_next_question(project_details, previous_questions, previous_answers):
+    """Generate the next relevant question based on previous context"""
+    recent_pairs = list(zip(previous_questions, previous_answers))[-QUESTION_CONTEXT_PAIRS:]
+    # Static instructions first and the changing Q/A log last, so turns share a cacheable prefix
+    context = f"""Generate the next most relevant question to ask about the project's technical requirements for AWS cloud architecture.
 The question should be natural and conversational, as if you're a real architecture engineer having a discussion.
 Focus on gathering information about:
 1. Expected user base and traffic
@@ -188,13 +189,19 @@ Focus on gathering information about:
 9. Monitoring and maintenance preferences
 10. Technical stack preferences
 
-Generate only ONE question, and make it sound natural and conversational."""
+Generate only ONE question, and make it sound natural and conversational.
+
+Project Title: {project_details['title']}
+Description: {project_details['description']}
+
+Previous Questions and Answers:
+{chr(10).join(f"Q: {q}\nA: {a}\n" for q, a in recent_pairs)}"""
 
     system_message = """You are an experienced cloud architecture engineer having a natural conversation with a client.
 Your goal is to gather technical requirements by asking one question at a time in a conversational manner.
 Make your questions sound natural and friendly, as if you're having a real discussion."""
 
-    return get_ai_response(context, system_message)
+    return get_ai_response(context, system_message, OPENAI_QUESTION_MODEL)
 
 def get_user_response(question):
     """Get user response to a single question"""
@@ -246,7 +253,7 @@ Use single line breaks between paragraphs for better formatting."""
 
     return get_ai_response(context, system_message)
 
-def get_ai_response(prompt, system_message):
+def get_ai_response(prompt, system_message, openai_model=OPENAI_MODEL):
     """Get response from the active AI model with fallback mechanisms"""
     global active_api
     
@@ -254,7 +261,7 @@ def get_ai_response(prompt, system_message):
         try:
             if active_api == "openai" and openai_client:
                 response = openai_client.chat.completions.create(
-                    model="gpt-4o-2024-11-20",
+                    model=openai_model,
                     messages=[
                         {"role": "system", "content": system_message},
                         {"role": "user", "content": prompt}
@@ -310,9 +317,9 @@ Focus on AWS security best practices and compliance requirements."""
 
     try:
         response = get_ai_response(context, system_message)
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
+        json_blob = extract_json(response)
+        if json_blob:
+            return orjson.loads(json_blob)
         return None
     except Exception as e:
         print_error(f"Error generating security assessment: {str(e)}")
@@ -320,14 +327,12 @@ Focus on AWS security best practices and compliance requirements."""
 
 def save_analysis_results(project_title: str, architecture_prompt: str, security_assessment: Optional[Dict]):
     """Save all analysis results to files"""
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    
     # Save architecture
     architecture_filename = save_file(project_title, architecture_prompt, "Architecture")
     
     # Save security assessment
     if security_assessment:
-        security_filename = save_file(project_title, json.dumps(security_assessment, indent=2), "SecurityAssessment")
+        security_filename = save_file(project_title, orjson.dumps(security_assessment, option=orjson.OPT_INDENT_2).decode(), "SecurityAssessment")
         print_info(f"Security assessment has been saved to '{security_filename}'")
     
     return architecture_filename  # Return the architecture filename
@@ -394,27 +399,23 @@ def modify_answers(questions, answers):
             
     return answers
 
+# Technical complexity indicators; each one found anywhere in the description scores a point
+TECH_INDICATORS = [
+    'microservices', 'distributed', 'real-time', 'machine learning', 'ai', 'iot',
+    'big data', 'analytics', 'streaming', 'container', 'kubernetes', 'serverless',
+    'multi-region', 'global', 'enterprise', 'mission-critical', 'high availability',
+    'disaster recovery', 'compliance', 'security', 'encryption', 'authentication',
+    'authorization', 'api', 'integration', 'database', 'cache', 'queue', 'message',
+    'event-driven', 'batch processing', 'data warehouse', 'data lake'
+]
+
 def determine_question_count(project_details):
     """Determine the number of questions based on project complexity"""
     # Analyze project description for complexity indicators
     description = project_details['description'].lower()
     
-    # Count complexity indicators
-    complexity_score = 0
-    
-    # Technical complexity indicators
-    tech_indicators = [
-        'microservices', 'distributed', 'real-time', 'machine learning', 'ai', 'iot',
-        'big data', 'analytics', 'streaming', 'container', 'kubernetes', 'serverless',
-        'multi-region', 'global', 'enterprise', 'mission-critical', 'high availability',
-        'disaster recovery', 'compliance', 'security', 'encryption', 'authentication',
-        'authorization', 'api', 'integration', 'database', 'cache', 'queue', 'message',
-        'event-driven', 'batch processing', 'data warehouse', 'data lake'
-    ]
-    
-    for indicator in tech_indicators:
-        if indicator in description:
-            complexity_score += 1
+    # Count each indicator at most once
+    complexity_score = sum(indicator in description for indicator in TECH_INDICATORS)
     
     # Determine question count based on complexity score
     if complexity_score <= 5:
@@ -0,0 +1,70 @@
+from functools import lru_cache
+
+def extract_json(text):
+    """Return the first balanced JSON object in text, or None if there is none"""
+    start = text.find('{')
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escape = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+# Deletes every ASCII character that is not alphanumeric, a space, '-' or '_'
+UNSAFE_ASCII = str.maketrans("", "", "".join(
+    chr(i) for i in range(128) if not (chr(i).isalnum() or chr(i) in " -_")
+))
+
+def make_safe_title(title):
+    """Strip a project title down to characters safe for folder and file names"""
+    if title.isascii():
+        return title.translate(UNSAFE_ASCII).strip()
+    # Non-ASCII titles keep any Unicode letters and digits
+    return "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
+
+# The AWS Pricing API is only served from us-east-1
+PRICING_API_REGION = "us-east-1"
+
+@lru_cache(maxsize=4)
+def create_pricing_client(aws_access_key_id, aws_secret_access_key):
+    """Build the Pricing API client once per set of credentials and share it across the estimators"""
+    # boto3 takes hundreds of milliseconds to import, so it is only loaded once a
+    # price is actually needed
+    import boto3
+    from botocore.config import Config
+
+    # The pool covers the estimators' thread pools so concurrent calls never queue for
+    # a connection; keepalive reuses the TLS connection between calls, adaptive retries
+    # back off client-side if the Pricing API throttles, and short timeouts turn a
+    # stalled connection into a quick retry instead of a long tail
+    return boto3.client(
+        'pricing',
+        region_name=PRICING_API_REGION,
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        config=Config(
+            max_pool_connections=64,
+            tcp_keepalive=True,
+            connect_timeout=3,
+            read_timeout=10,
+            retries={'mode': 'adaptive', 'max_attempts': 10}
+        )
+    )